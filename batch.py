@@ -0,0 +1,181 @@
+# batch.py
+"""
+Tryb wsadowy (bez GUI): wyszukuje gięcia w wielu plikach DXF i liczy dla nich BD.
+
+    python batch.py zlecenie/ --material CZ --grubosc 2 --v 16 -o wyniki.csv
+    python batch.py "zlecenie/*.dxf" --material N --grubosc 1.5 --v 12 -o wyniki.json
+
+Pliki przetwarzane są w puli procesów – każdy proces wczytuje modele raz (ostatnio używana wersja
+z magazynu modeli), a wyniki zapisywane są na bieżąco, w kolejności kończenia detali.
+Moduł nie importuje PyQt5.
+"""
+import argparse
+import csv
+import glob
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from contextlib import redirect_stdout
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+
+FIELDS = ["plik", "material", "grubosc", "V", "giecia", "katy", "dlugosc", "bd", "pominiete_linie", "czas_s", "blad"]
+
+# Stan procesu roboczego (ustawiany w _init_worker)
+_model = None
+_cache = None
+
+
+def find_dxf_files(inputs):
+    """Pliki DXF z podanych katalogów, wzorców glob i ścieżek – posortowane, bez powtórzeń."""
+    paths = set()
+    for entry in inputs:
+        if os.path.isdir(entry):
+            paths.update(os.path.join(entry, name) for name in os.listdir(entry) if name.lower().endswith(".dxf"))
+        elif os.path.isfile(entry):
+            paths.add(entry)
+        else:
+            paths.update(glob.glob(entry, recursive=True))
+    return sorted(os.path.abspath(path) for path in paths)
+
+
+def _new_model():
+    """BDModel ze ścieżkami magazynu względem katalogu projektu (niezależnie od katalogu roboczego)."""
+    from models.bd_model import BDModel
+
+    model = BDModel()
+    model.store_dir = os.path.join(BASE_DIR, model.store_dir)
+    model.legacy_model_path_CZ = os.path.join(BASE_DIR, model.legacy_model_path_CZ)
+    model.legacy_model_path_N = os.path.join(BASE_DIR, model.legacy_model_path_N)
+    model.params_path = os.path.join(BASE_DIR, model.params_path)
+    return model
+
+
+def prepare_models():
+    """
+    Gdy magazyn modeli jest pusty, migruje dawne modele joblib w procesie głównym –
+    inaczej wszystkie procesy robocze próbowałyby zapisać tę samą wersję jednocześnie.
+    """
+    model = _new_model()
+    if not any(os.path.exists(os.path.join(model.store_dir, name)) for name in ("CURRENT", "legacy")):
+        model.load_active_models()
+
+
+def _init_worker(use_cache):
+    """Inicjalizacja procesu roboczego: modele i pamięć podręczna geometrii wczytywane raz na proces."""
+    global _model, _cache
+    from data.dxf_cache import DXF_CACHE_DIR, DxfGeometryCache
+
+    # Komunikaty modułów (print) nie mogą trafić do wyników wypisywanych na stdout
+    sys.stdout = sys.stderr
+    model = _new_model()
+    if model.load_active_models():
+        _model = model
+    _cache = DxfGeometryCache(os.path.join(BASE_DIR, DXF_CACHE_DIR)) if use_cache else None
+
+
+def process_part(file_path, material, grubosc, V):
+    """Analiza gięć i BD jednego detalu; błędy zwracane są w polu 'blad' zamiast przerywać całe zlecenie."""
+    import numpy as np
+    from data.bend_analysis import analyze_dxf_file
+
+    start = time.perf_counter()
+    result = {"plik": file_path, "material": material, "grubosc": grubosc, "V": V}
+    try:
+        if _model is None:
+            raise RuntimeError("Brak wytrenowanych modeli – uruchom najpierw aplikację, aby je przygotować.")
+        analysis = analyze_dxf_file(file_path, cache=_cache)
+        angles = np.asarray([90.0 if bend.angle is None else bend.angle for bend in analysis.bends])
+        bd_values = _model.predict_many(grubosc, V, angles, material)
+        result.update({
+            "giecia": len(angles),
+            "katy": ";".join(f"{angle:g}" for angle in angles),
+            "dlugosc": round(float(analysis.segment_lengths().sum()), 2),
+            "bd": round(float(bd_values.sum()), 2),
+            "pominiete_linie": len(analysis.skipped),
+            "blad": "",
+        })
+    except Exception as e:
+        result["blad"] = str(e) or type(e).__name__
+    result["czas_s"] = round(time.perf_counter() - start, 3)
+    return result
+
+
+class ResultWriter:
+    """Zapisuje wyniki na bieżąco jako CSV albo tablicę JSON (domykaną w close)."""
+    def __init__(self, file, output_format):
+        self.file = file
+        self.output_format = output_format
+        self.count = 0
+        if output_format == "csv":
+            self._csv = csv.DictWriter(file, fieldnames=FIELDS)
+            self._csv.writeheader()
+        else:
+            file.write("[")
+
+    def write(self, result):
+        if self.output_format == "csv":
+            self._csv.writerow(result)
+        else:
+            self.file.write(("," if self.count else "") + "\n  " + json.dumps(result, ensure_ascii=False))
+        self.count += 1
+        self.file.flush()
+
+    def close(self):
+        if self.output_format == "json":
+            self.file.write("\n]\n")
+        self.file.flush()
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Wsadowe obliczanie BD dla plików DXF (bez GUI).")
+    parser.add_argument("inputs", nargs="+", help="katalogi, pliki DXF lub wzorce glob (np. 'zlecenie/**/*.dxf')")
+    parser.add_argument("--material", required=True, choices=["CZ", "N"])
+    parser.add_argument("--grubosc", required=True, type=float, help="grubość blachy [mm]")
+    parser.add_argument("--v", dest="V", required=True, type=float, help="szerokość matrycy V [mm]")
+    parser.add_argument("-o", "--output", default="-", help="plik wynikowy .csv lub .json (domyślnie CSV na stdout)")
+    parser.add_argument("--format", choices=["csv", "json"], help="format wyniku (domyślnie wg rozszerzenia pliku)")
+    parser.add_argument("-j", "--workers", type=int, default=None, help="liczba procesów (domyślnie liczba rdzeni)")
+    parser.add_argument("--no-cache", action="store_true", help="bez pamięci podręcznej geometrii DXF")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    files = find_dxf_files(args.inputs)
+    if not files:
+        print("Nie znaleziono plików DXF.", file=sys.stderr)
+        return 1
+
+    output_format = args.format or ("json" if args.output.lower().endswith(".json") else "csv")
+    output = sys.stdout if args.output == "-" else open(args.output, "w", encoding="utf-8", newline="")
+    writer = ResultWriter(output, output_format)
+    workers = min(args.workers or os.cpu_count() or 1, len(files))
+    failed = 0
+    start = time.perf_counter()
+    with redirect_stdout(sys.stderr):
+        prepare_models()
+    try:
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                                 initargs=(not args.no_cache,)) as executor:
+            futures = [executor.submit(process_part, path, args.material, args.grubosc, args.V) for path in files]
+            for done, future in enumerate(as_completed(futures), start=1):
+                result = future.result()
+                writer.write(result)
+                if result["blad"]:
+                    failed += 1
+                    print(f"[{done}/{len(files)}] {result['plik']}: {result['blad']}", file=sys.stderr)
+    finally:
+        writer.close()
+        if output is not sys.stdout:
+            output.close()
+
+    print(f"Przetworzono {len(files)} plików ({failed} z błędem) w {time.perf_counter() - start:.1f} s "
+          f"({workers} proc.).", file=sys.stderr)
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,175 @@
+# data/bend_analysis.py
+import re
+import numpy as np
+from data.dxf_geometry import GeometryBounds, iter_dxf_batches
+from utils.spatial_index import LineGridIndex
+
+# Linie o kierunkach różniących się najwyżej o tyle stopni traktujemy jako równoległe
+ANGLE_TOLERANCE = 1.0
+# Odcinki jednej linii gięcia (np. przerwanej wycięciem) leżą w tej samej odległości od osi kołnierzy [mm]
+POSITION_TOLERANCE = 0.1
+# Maksymalna odległość opisu TEXT/MTEXT od linii gięcia, do której się odnosi [mm]
+TEXT_RADIUS = 20.0
+
+_NUMBER = r"([+-]?\d+(?:[.,]\d+)?)"
+_DEGREES = re.compile(_NUMBER + r"\s*(?:°|%%d|deg\b|st\b)", re.IGNORECASE)
+_KEYWORD = re.compile(r"(?:up|down|bend|g[óo]ra|d[óo][łl]|gi[ęe]cie|k[ąa]t)[\s_:=-]*" + _NUMBER, re.IGNORECASE)
+_ONLY_NUMBER = re.compile(r"^\s*" + _NUMBER + r"\s*$")
+
+
+def parse_angle(text):
+    """
+    Kąt gięcia z opisu lub nazwy warstwy ("90°", "UP 45", "GIECIE_90", "135") albo None.
+    Znak (gięcie w górę/w dół) jest pomijany; akceptujemy wartości z przedziału (0, 180].
+    """
+    if not text:
+        return None
+    for pattern in (_DEGREES, _KEYWORD, _ONLY_NUMBER):
+        match = pattern.search(text)
+        if match:
+            value = abs(float(match.group(1).replace(",", ".")))
+            return value if 0 < value <= 180 else None
+    return None
+
+
+class Bend:
+    """Jedno gięcie: współliniowe odcinki linii gięcia w tej samej pozycji na osi kołnierzy."""
+    def __init__(self, position, line_ids, angle=None):
+        self.position = position  # odległość od początku detalu wzdłuż osi kołnierzy [mm]
+        self.line_ids = line_ids
+        self.angle = angle        # None – kąt nieopisany na rysunku
+
+
+class BendAnalysis:
+    """
+    Wynik analizy linii gięcia: gięcia posortowane wzdłuż osi kołnierzy (prostopadłej do linii)
+    oraz dla każdej linii numer jej gięcia i pozycja (-1 / NaN dla linii nierównoległych).
+    """
+    def __init__(self, line_count, axis=(1.0, 0.0), start=0.0):
+        self.axis = axis
+        self.start = start  # rzut krawędzi detalu na oś kołnierzy – początek pozycji gięć
+        self.bends = []
+        self.line_bends = np.full(line_count, -1, dtype=np.int64)
+        self.line_positions = np.full(line_count, np.nan)
+
+    @property
+    def skipped(self):
+        """Identyfikatory linii nierównoległych do dominującego kierunku gięć."""
+        return np.flatnonzero(self.line_bends < 0).tolist()
+
+    def segment_lengths(self):
+        """Długości segmentów jak w tabeli: od krawędzi detalu do pierwszego gięcia, dalej między gięciami."""
+        return np.diff([bend.position for bend in self.bends], prepend=0.0)
+
+    def position_of(self, x, y):
+        """Pozycja punktu rysunku (x, y) na osi kołnierzy – w tym samym układzie co pozycje gięć."""
+        return float(x * self.axis[0] + y * self.axis[1]) - self.start
+
+    def bend_of(self, line_id):
+        if line_id is None or not 0 <= line_id < len(self.line_bends) or self.line_bends[line_id] < 0:
+            return None
+        return self.bends[self.line_bends[line_id]]
+
+
+def _dominant_direction(dx, dy, lengths):
+    """Kierunek (stopnie, [0, 180)) o największej łącznej długości linii – histogram co 1°."""
+    angles = np.degrees(np.arctan2(dy, dx)) % 180.0
+    histogram = np.bincount(np.round(angles).astype(np.int64) % 180, weights=lengths, minlength=180)
+    # Sąsiednie przedziały sumujemy, aby linie blisko granicy przedziału nie rozbijały szczytu
+    smoothed = histogram + np.roll(histogram, 1) + np.roll(histogram, -1)
+    peak = float(np.argmax(smoothed))
+    difference = (angles - peak + 90.0) % 180.0 - 90.0
+    parallel = np.abs(difference) <= ANGLE_TOLERANCE + 1.0
+    # Średnia ważona odchyłek od szczytu – dokładny kierunek grupy
+    direction = peak + np.average(difference[parallel], weights=np.maximum(lengths[parallel], 1e-9))
+    difference = (angles - direction + 90.0) % 180.0 - 90.0
+    return direction, np.abs(difference) <= ANGLE_TOLERANCE
+
+
+def analyze_bends(lines, layers=None, texts=None, bounds=None):
+    """
+    Wyszukuje gięcia na rysunku.
+    lines – tablica (n, 4) odcinków linii gięcia (x1, y1, x2, y2) w kolejności identyfikatorów,
+    layers – opcjonalne nazwy warstw linii, texts – opcjonalne opisy (tekst, x, y),
+    bounds – (min_x, min_y, max_x, max_y) detalu; pozycje liczone są od jego krawędzi.
+
+    Linie równoległe do dominującego kierunku grupowane są po odległości od osi kołnierzy
+    (współliniowe odcinki to jedno gięcie). Kąt bierzemy z najbliższego opisu w promieniu TEXT_RADIUS,
+    a gdy go brak – z nazwy warstwy którejkolwiek linii gięcia.
+    """
+    lines = np.asarray(lines, dtype=float).reshape(-1, 4)
+    n = len(lines)
+    if n == 0:
+        return BendAnalysis(0)
+
+    dx = lines[:, 2] - lines[:, 0]
+    dy = lines[:, 3] - lines[:, 1]
+    direction, parallel = _dominant_direction(dx, dy, np.hypot(dx, dy))
+
+    # Oś kołnierzy – prostopadła do linii gięcia, skierowana w stronę rosnących x (dla linii poziomych: y)
+    radians = np.radians(direction)
+    axis = np.array([-np.sin(radians), np.cos(radians)])
+    if axis[0] < -1e-9 or (abs(axis[0]) <= 1e-9 and axis[1] < 0):
+        axis = -axis
+    midpoints = (lines[:, :2] + lines[:, 2:]) / 2
+    offsets = midpoints @ axis
+    if bounds is not None:
+        min_x, min_y, max_x, max_y = bounds
+        corners = np.array([(min_x, min_y), (min_x, max_y), (max_x, min_y), (max_x, max_y)], dtype=float)
+        start = float((corners @ axis).min())
+    else:
+        start = 0.0
+    analysis = BendAnalysis(n, (float(axis[0]), float(axis[1])), start)
+
+    ids = np.flatnonzero(parallel)
+    ids = ids[np.argsort(offsets[ids], kind='stable')]
+    group_starts = np.flatnonzero(np.diff(offsets[ids], prepend=-np.inf) > POSITION_TOLERANCE)
+    for number, members in enumerate(np.split(ids, group_starts[1:])):
+        position = float(offsets[members].mean()) - start
+        analysis.bends.append(Bend(position, members.tolist()))
+        analysis.line_bends[members] = number
+        analysis.line_positions[members] = position
+
+    _assign_text_angles(analysis, lines, parallel, texts or [])
+    if layers is not None:
+        for bend in analysis.bends:
+            if bend.angle is None:
+                bend.angle = next((angle for angle in (parse_angle(layers[i]) for i in bend.line_ids)
+                                   if angle is not None), None)
+    return analysis
+
+
+def _assign_text_angles(analysis, lines, parallel, texts):
+    """Przypisuje gięciom kąty z najbliższych im opisów (jeden opis – jedno gięcie)."""
+    labels = [(angle, x, y) for angle, x, y in ((parse_angle(text), x, y) for text, x, y in texts)
+              if angle is not None]
+    if not labels:
+        return
+    ids = np.flatnonzero(parallel)
+    index = LineGridIndex(lines[ids, 0], lines[ids, 1], lines[ids, 2], lines[ids, 3])
+    best = {}
+    for angle, x, y in labels:
+        found, distance = index.nearest(x, y, TEXT_RADIUS)
+        if found is None:
+            continue
+        number = int(analysis.line_bends[ids[found]])
+        if number not in best or distance < best[number][0]:
+            best[number] = (distance, angle)
+    for number, (_, angle) in best.items():
+        analysis.bends[number].angle = angle
+
+
+def analyze_dxf_file(file_path, cache=None, cancel_event=None):
+    """
+    Wczytuje rysunek bez Qt i zwraca BendAnalysis – tę samą analizę, którą widok wykonuje po wczytaniu.
+    cache – opcjonalna DxfGeometryCache (zob. iter_dxf_batches).
+    """
+    bounds = GeometryBounds()
+    lines, layers, texts = [], [], []
+    for batch, _, _ in iter_dxf_batches(file_path, cancel_event=cancel_event, cache=cache):
+        bounds.update(batch)
+        for layer, *coords in batch.bending_lines:
+            layers.append(layer)
+            lines.append(coords)
+        texts.extend(batch.texts)
+    return analyze_bends(lines, layers, texts, bounds.rect)
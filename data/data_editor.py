@@ -1,19 +1,11 @@
 # data/data_editor.py
 from PyQt5.QtWidgets import (
-    QDialog, QVBoxLayout, QTableWidget, QTableWidgetItem, QHBoxLayout, QPushButton, QMessageBox
+    QDialog, QVBoxLayout, QTableView, QHBoxLayout, QPushButton, QMessageBox
 )
 from PyQt5.QtGui import QIcon
-import pandas as pd
-from data.data_loader import save_data_to_json
-from utils.utils import parse_decimal_input
-
-def safe_to_numeric(value):
-    """Bezpieczna konwersja wartości na liczbę dziesiętną."""
-    try:
-        value = parse_decimal_input(value)
-        return pd.to_numeric(value)
-    except ValueError:
-        return value
+from data.data_loader import save_data
+from data.data_table_model import DataFrameTableModel
+from models.bd_model import FEATURES, TARGETS
 
 DATA_FILE = 'Ubytki.xlsx'
 
@@ -22,26 +14,25 @@ class DataEditorDialog(QDialog):
     def __init__(self, data, parent=None):
         super().__init__(parent)
         self.setWindowTitle("Edycja Danych Treningowych")
-        self.data = data.copy()
+        # Model czyta wprost z kolumn DataFrame (bez kopii) – edycje trzyma osobno
+        self.data = data
+        self.table_model = DataFrameTableModel(data)
         self.init_ui()
 
     def init_ui(self):
         layout = QVBoxLayout()
 
-        # Tabela danych
-        self.table = QTableWidget(len(self.data), len(self.data.columns))
-        self.table.setHorizontalHeaderLabels(self.data.columns)
-
-        for row, (_, row_data) in enumerate(self.data.iterrows()):
-            for col, value in enumerate(row_data):
-                self.table.setItem(row, col, QTableWidgetItem(str(value)))
-
+        # Tabela danych – widok rysuje tylko widoczne wiersze
+        self.table = QTableView()
+        self.table.setModel(self.table_model)
+        # Szerokości kolumn z próbki wierszy, a nie z całego zbioru
+        self.table.horizontalHeader().setResizeContentsPrecision(200)
         self.table.resizeColumnsToContents()
 
-        total_column_width = sum(self.table.columnWidth(col) for col in range(self.table.columnCount()))
+        total_column_width = sum(self.table.columnWidth(col) for col in range(self.table_model.columnCount()))
         total_column_width += self.table.verticalHeader().width() + 20
 
-        row_height = self.table.rowHeight(0) if self.table.rowCount() > 0 else 30
+        row_height = self.table.rowHeight(0) if self.table_model.rowCount() > 0 else 30
         header_height = self.table.horizontalHeader().height()
         total_height = header_height + (row_height * 15) + 40
 
@@ -78,64 +69,67 @@ class DataEditorDialog(QDialog):
         layout.addLayout(button_layout)
         self.setLayout(layout)
 
+    def set_data(self, data):
+        """Podmienia edytowane dane (np. po zapisie – ponowne otwarcie pokazuje stan zapisany)."""
+        self.data = data
+        self.table_model.set_data(data)
+
     def add_row(self):
-        row_count = self.table.rowCount()
-        self.table.insertRow(row_count)
+        row = self.table_model.insert_row()
+        self.table.scrollToBottom()
+        self.table.selectRow(row)
 
     def remove_row(self):
         selected_rows = set(idx.row() for idx in self.table.selectionModel().selectedIndexes())
-        for row in sorted(selected_rows, reverse=True):
-            self.table.removeRow(row)
+        self.table_model.remove_rows(selected_rows)
 
     def move_row_up(self):
-        current_row = self.table.currentRow()
+        current_row = self.table.currentIndex().row()
         if current_row > 0:
             self.swap_rows(current_row, current_row - 1)
             self.table.selectRow(current_row - 1)
 
     def move_row_down(self):
-        current_row = self.table.currentRow()
-        if current_row < self.table.rowCount() - 1:
+        current_row = self.table.currentIndex().row()
+        if 0 <= current_row < self.table_model.rowCount() - 1:
             self.swap_rows(current_row, current_row + 1)
             self.table.selectRow(current_row + 1)
 
     def swap_rows(self, row1, row2):
-        for col in range(self.table.columnCount()):
-            item1 = self.table.item(row1, col)
-            item2 = self.table.item(row2, col)
-            value1 = item1.text() if item1 else ""
-            value2 = item2.text() if item2 else ""
-            self.table.setItem(row1, col, QTableWidgetItem(value2))
-            self.table.setItem(row2, col, QTableWidgetItem(value1))
+        self.table_model.swap_rows(row1, row2)
 
     def save_changes(self):
         try:
-            rows = self.table.rowCount()
-            cols = self.table.columnCount()
-            new_data = []
-
-            for row in range(rows):
-                row_data = []
-                for col in range(cols):
-                    item = self.table.item(row, col)
-                    value = item.text() if item else ""
-                    row_data.append(value)
-                new_data.append(row_data)
-
-            new_data = pd.DataFrame(new_data, columns=self.data.columns)
-            new_data = new_data.apply(lambda x: x.map(safe_to_numeric))
-
-            save_data_to_json(new_data)
+            if not self.table_model.is_dirty():
+                print("Brak zmian w danych – zapis pominięty.")
+                self.accept()
+                return
+
+            new_data = self.table_model.to_dataframe()
+
+            # Wiersze bez kompletu cech i wartości BD nie mogą trafić do danych treningowych
+            required = [name for name in FEATURES + list(TARGETS.values()) if name in new_data.columns]
+            incomplete = new_data[required].isna().any(axis=1).to_numpy().nonzero()[0]
+            if len(incomplete):
+                rows = ", ".join(str(row + 1) for row in incomplete[:10]) + (" ..." if len(incomplete) > 10 else "")
+                QMessageBox.warning(self, "Niekompletne dane",
+                                    f"Uzupełnij kolumny {', '.join(required)} w wierszach: {rows}.")
+                self.table.selectRow(int(incomplete[0]))
+                return
+
+            save_data(new_data)
             self.parent().data = new_data
+            self.set_data(new_data)
 
             print(f"Model przekazany z obiektu nadrzędnego: {getattr(self.parent(), 'model', None)}")
             if hasattr(self.parent(), "model") and self.parent().model is not None:
-                self.parent().model.train_models(new_data, force_retrain=True)
-                print("Model przetrenowano na nowych danych.")
+                # Trening w tle – okno pozostaje responsywne, stare modele działają do czasu podmiany
+                self.parent().start_model_training(new_data)
+                print("Uruchomiono trening modelu na nowych danych.")
             else:
                 print("Nie znaleziono modelu w obiekcie nadrzędnym.")
 
-            QMessageBox.information(self, "Sukces", "Dane zapisano i modele przetrenowano.")
+            QMessageBox.information(self, "Sukces", "Dane zapisano. Trening modeli trwa w tle.")
             self.accept()
 
         except Exception as e:
@@ -1,6 +1,8 @@
 # data/data_list.py
 import os
 import xml.etree.ElementTree as ET
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
 import pandas as pd
 
 MATERIAL_MAP = {
@@ -9,44 +11,125 @@ MATERIAL_MAP = {
     'By Steel': 'CZ'
 }
 
-def load_data_from_xml(folder_path):
-    data = []
-    xml_files = ['1.4301.xml', 'By Steel.xml', 'Al Mg 3.xml']
+# Domyślny zestaw eksportów z prasy krawędziowej
+XML_FILES = ['1.4301.xml', 'By Steel.xml', 'Al Mg 3.xml']
+
+COLUMNS = ['Grubosc', 'V', 'Kat', 'BD']
+
+
+class _ColumnBuffer:
+    """Prealokowane kolumny float64 powiększane dwukrotnie po zapełnieniu."""
+    def __init__(self, columns, capacity=4096):
+        self.size = 0
+        self.arrays = {name: np.empty(capacity, dtype=np.float64) for name in columns}
+
+    def append(self, *values):
+        if self.size == len(next(iter(self.arrays.values()))):
+            for name, array in self.arrays.items():
+                grown = np.empty(len(array) * 2, dtype=np.float64)
+                grown[:self.size] = array[:self.size]
+                self.arrays[name] = grown
+        for array, value in zip(self.arrays.values(), values):
+            array[self.size] = value
+        self.size += 1
+
+    def columns(self):
+        return {name: array[:self.size] for name, array in self.arrays.items()}
+
+
+def _parse_bend_table_file(full_path):
+    """
+    Strumieniowo parsuje jeden plik XML z tabelami gięcia (iterparse, bez budowy pełnego drzewa).
+    Zwraca słownik kolumn NumPy oraz kod materiału.
+    """
+    buffer = _ColumnBuffer(COLUMNS)
+    material = 'Unknown'
+    thickness = 0.0
+    v_width = 0.0
+
+    for event, elem in ET.iterparse(full_path, events=("start", "end")):
+        if event == "start":
+            if elem.tag == 'Material':
+                material = MATERIAL_MAP.get(elem.attrib.get('Name', 'Unknown'), 'Unknown')
+            elif elem.tag == 'DataTable':
+                thickness = float(elem.attrib.get('SheetThickness', '0'))
+                v_width = float(elem.attrib.get('DieOpeningWidth', '0'))
+        elif elem.tag == 'DTEntry':
+            angle = float(elem.attrib.get('BendAngle', '0'))
+            bd = float(elem.attrib.get('DX', '0'))
+            buffer.append(thickness, v_width, angle, bd)
+            elem.clear()
+        elif elem.tag == 'DataTable':
+            elem.clear()
+
+    columns = buffer.columns()
+    columns['Material'] = np.full(buffer.size, material)
+    return columns
+
+
+def _interpolate_groups(group_keys, values):
+    """
+    Interpolacja liniowa braków (NaN) w obrębie grup kolejnych wierszy o tym samym kluczu,
+    jak groupby(...).interpolate(): luki między wartościami liniowo, końcowe braki wartością ostatnią,
+    początkowe braki pozostają NaN. Dane muszą być posortowane po kluczu grupy.
+    """
+    n = len(values)
+    missing = np.isnan(values)
+    if n == 0 or not missing.any():
+        return values
+
+    idx = np.arange(n)
+    new_group = np.ones(n, dtype=bool)
+    for key in group_keys:
+        new_group[1:] &= key[1:] == key[:-1]
+    new_group = ~new_group
+    new_group[0] = True
+    group_id = np.cumsum(new_group) - 1
+    group_start = idx[new_group]
+    group_end = np.append(group_start[1:], n) - 1
+
+    valid = ~missing
+    prev_valid = np.maximum.accumulate(np.where(valid, idx, -1))
+    next_valid = np.minimum.accumulate(np.where(valid, idx, n)[::-1])[::-1]
+    has_prev = prev_valid >= group_start[group_id]
+    has_next = next_valid <= group_end[group_id]
+
+    result = values.copy()
+    between = missing & has_prev & has_next
+    p = prev_valid[between]
+    q = next_valid[between]
+    result[between] = values[p] + (values[q] - values[p]) * (idx[between] - p) / (q - p)
+
+    trailing = missing & has_prev & ~has_next
+    result[trailing] = values[prev_valid[trailing]]
+    return result
+
+
+def load_data_from_xml(folder_path, xml_files=None, max_workers=None):
+    """
+    Wczytuje tabele gięcia z plików XML (domyślnie XML_FILES) z podanego folderu.
+    Pliki parsowane są równolegle w puli procesów.
+    """
+    xml_files = XML_FILES if xml_files is None else xml_files
+    paths = []
     for filename in xml_files:
         full_path = os.path.join(folder_path, filename)
         if os.path.exists(full_path):
-            tree = ET.parse(full_path)
-            root = tree.getroot()
-
-            material_element = root.find('.//Material')
-            if material_element is not None:
-                original_material = material_element.attrib.get('Name', 'Unknown')
-                material = MATERIAL_MAP.get(original_material, 'Unknown')
-            else:
-                material = 'Unknown'
-
-            for data_table in material_element.findall('.//DataTable'):
-                thickness = float(data_table.attrib.get('SheetThickness', '0'))
-                v_width = float(data_table.attrib.get('DieOpeningWidth', '0'))
-
-                dt_entries = data_table.find('.//DTEntries')
-                if dt_entries is not None:
-                    for dt_entry in dt_entries.findall('.//DTEntry'):
-                        angle = float(dt_entry.attrib.get('BendAngle', '0'))
-                        bd = float(dt_entry.attrib.get('DX', '0'))
-
-                        data.append({
-                            'Material': material,
-                            'Grubosc': thickness,
-                            'V': v_width,
-                            'Kat': angle,
-                            'BD': bd
-                        })
+            paths.append(full_path)
         else:
             print(f"Plik {filename} nie istnieje w folderze {folder_path}.")
-    df = pd.DataFrame(data)
-    df = df.sort_values(['Grubosc', 'V', 'Kat']).reset_index(drop=True)
 
-    df['BD'] = df.groupby(['Grubosc', 'V'])['BD'].apply(lambda group: group.interpolate()).reset_index(level=[0, 1], drop=True)
+    if len(paths) > 1:
+        with ProcessPoolExecutor(max_workers=max_workers) as executor:
+            parsed = list(executor.map(_parse_bend_table_file, paths))
+    else:
+        parsed = [_parse_bend_table_file(path) for path in paths]
+
+    columns = {name: np.concatenate([part[name] for part in parsed]) if parsed else np.empty(0)
+               for name in ['Material'] + COLUMNS}
+
+    order = np.lexsort((columns['Kat'], columns['V'], columns['Grubosc']))
+    columns = {name: array[order] for name, array in columns.items()}
+    columns['BD'] = _interpolate_groups((columns['Grubosc'], columns['V']), columns['BD'])
 
-    return df
+    return pd.DataFrame(columns, columns=['Material'] + COLUMNS)
@@ -1,24 +1,87 @@
 # data_loader.py
 import os
 import json
+import shutil
+import numpy as np
 import pandas as pd
-from ui.matrix_config_editor import load_matrix_config
+from data.matrix_config import matrix_config_service
 
 # Domyślne ścieżki plików (przykład)
+DATA_STORE_DIR = "data_store"
 DATA_FILE_JSON = "data.json"
 DATA_FILE_EXCEL = "Ubytki.xlsx"
 
 
-def load_data():
-    """Wczytuje dane z pliku JSON lub Excela."""
-    if os.path.exists(DATA_FILE_JSON):
-        return load_data_from_json(DATA_FILE_JSON)
+def load_data(mmap=False):
+    """
+    Wczytuje dane treningowe z magazynu kolumnowego, a gdy go nie ma – z pliku JSON lub Excela
+    (dane z tych plików są od razu przenoszone do magazynu kolumnowego).
+    """
+    if os.path.exists(os.path.join(DATA_STORE_DIR, "columns.json")):
+        return load_data_from_store(DATA_STORE_DIR, mmap=mmap)
+    elif os.path.exists(DATA_FILE_JSON):
+        data = load_data_from_json(DATA_FILE_JSON)
+        save_data(data, DATA_STORE_DIR)
+        print(f"Zmigrowano dane z {DATA_FILE_JSON} do magazynu kolumnowego {DATA_STORE_DIR}.")
+        return data
     elif os.path.exists(DATA_FILE_EXCEL):
         data = import_data_from_excel(DATA_FILE_EXCEL)
-        save_data_to_json(data, DATA_FILE_JSON)
+        save_data(data, DATA_STORE_DIR)
         return data
     else:
-        raise FileNotFoundError(f"Brak pliku {DATA_FILE_JSON} lub {DATA_FILE_EXCEL}.")
+        raise FileNotFoundError(f"Brak katalogu {DATA_STORE_DIR} ani pliku {DATA_FILE_JSON} lub {DATA_FILE_EXCEL}.")
+
+
+def load_data_from_store(store_dir=DATA_STORE_DIR, mmap=False):
+    """
+    Wczytuje dane z magazynu kolumnowego (jeden plik .npy na kolumnę + columns.json).
+    mmap=True mapuje kolumny do pamięci zamiast wczytywać je w całości (tylko do odczytu).
+    """
+    with open(os.path.join(store_dir, "columns.json"), "r", encoding="utf-8") as file:
+        columns = json.load(file)
+
+    mmap_mode = "r" if mmap else None
+    arrays = {}
+    for column in columns:
+        arrays[column["name"]] = np.load(os.path.join(store_dir, column["file"]), mmap_mode=mmap_mode)
+    return pd.DataFrame(arrays, copy=False)
+
+
+def save_data(data, store_dir=DATA_STORE_DIR):
+    """
+    Zapisuje dane treningowe do magazynu kolumnowego.
+    Kolumny liczbowe zapisywane są jako float64, pozostałe jako tekst (bez pickle).
+    Zapis jest atomowy: katalog tymczasowy podmieniany jest dopiero po zapisaniu wszystkich kolumn.
+    """
+    tmp_dir = f"{store_dir}.tmp"
+    old_dir = f"{store_dir}.old"
+    try:
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+        os.makedirs(tmp_dir)
+
+        columns = []
+        for i, name in enumerate(data.columns):
+            series = data[name]
+            if pd.api.types.is_numeric_dtype(series):
+                values = series.to_numpy(dtype=np.float64)
+            else:
+                values = series.astype(str).to_numpy(dtype=np.str_)
+            file_name = f"col_{i:03d}.npy"
+            np.save(os.path.join(tmp_dir, file_name), values, allow_pickle=False)
+            columns.append({"name": str(name), "file": file_name, "dtype": values.dtype.str})
+
+        with open(os.path.join(tmp_dir, "columns.json"), "w", encoding="utf-8") as file:
+            json.dump(columns, file, indent=4, ensure_ascii=False)
+
+        shutil.rmtree(old_dir, ignore_errors=True)
+        if os.path.exists(store_dir):
+            os.replace(store_dir, old_dir)
+        os.replace(tmp_dir, store_dir)
+        shutil.rmtree(old_dir, ignore_errors=True)
+        print(f"Dane zapisano do magazynu kolumnowego: {store_dir}")
+    except Exception as e:
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+        raise IOError(f"Nie udało się zapisać danych: {e}")
 
 
 def load_data_from_json(file_path="data.json"):
@@ -30,16 +93,6 @@ def load_data_from_json(file_path="data.json"):
     return pd.DataFrame(data)
 
 
-def save_data_to_json(data, file_path="data.json"):
-    """Zapisuje dane treningowe do pliku JSON."""
-    try:
-        with open(file_path, "w", encoding="utf-8") as file:
-            json.dump(data.to_dict(orient="records"), file, indent=4)
-            print(f"Dane zapisano do pliku JSON: {file_path}")
-    except Exception as e:
-        raise IOError(f"Nie udało się zapisać danych do JSON: {e}")
-
-
 def import_data_from_excel(file_path="Ubytki.xlsx"):
     """Importuje dane treningowe z pliku Excel."""
     try:
@@ -68,28 +121,14 @@ def import_data_from_excel(file_path="Ubytki.xlsx"):
 def filter_matrix_widths(grubosc, widths):
     """
     Filtruje szerokości matryc na podstawie konfiguracji.
-    1) W pliku config/matrix_config.json klucze mogą być np. "2.0", "3.0".
-    2) Ujednolicamy klucz do formatu str(float(grubosc)).
-    3) Konwertujemy wartości do float, aby porównać z 'widths'.
+    Korzysta z indeksu w pamięci (matrix_config_service) – nie czyta pliku konfiguracji.
+    Gdy grubości nie ma w konfiguracji, zwraca 'widths' bez zmian.
     """
-    print(f"DEBUG: filter_matrix_widths -> grubosc={grubosc}, widths={widths}")
-    config = load_matrix_config()  # np. {"2.0": ["6.0","8.0"], "3.0": ["10.0","12.0"]}
-    # ujednolicamy klucz – np. grubosc=2 -> "2.0"
-    key = str(float(grubosc))
-    print("DEBUG: klucz w configu =", key)
-
-    # pobieramy z configa listę dozwolonych szerokości (domyślnie używamy widths)
-    allowed_widths_raw = config.get(key, widths)
-    print("DEBUG: allowed_widths_raw z configu =", allowed_widths_raw)
-
-    # konwertujemy na float, bo w pliku config mogą być stringi
-    allowed_widths_floats = [float(x) for x in allowed_widths_raw]
-
-    # Teraz filtrujemy 'widths'
-    # widths (z DataFrame) powinny być float, np. [6.0, 8.0, 10.0]
-    # Zwracamy tylko te, które są w allowed_widths_floats
-    filtered = [w for w in widths if w in allowed_widths_floats]
-    print(f"DEBUG: Po filtrze zwracamy {filtered}\n")
+    allowed_widths = matrix_config_service.allowed_widths(grubosc)
+    if allowed_widths is None:
+        return list(widths)
+    filtered = [w for w in widths if float(w) in allowed_widths]
+    print(f"DEBUG: filter_matrix_widths -> grubosc={grubosc}, po filtrze {filtered}")
     return filtered
 
 
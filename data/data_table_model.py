@@ -0,0 +1,140 @@
+# data/data_table_model.py
+import numpy as np
+import pandas as pd
+from PyQt5.QtCore import Qt, QAbstractTableModel, QModelIndex
+from utils.utils import parse_decimal_input
+
+
+def safe_to_numeric(value):
+    """Bezpieczna konwersja wartości na liczbę dziesiętną."""
+    try:
+        value = parse_decimal_input(value)
+        return pd.to_numeric(value)
+    except ValueError:
+        return value
+
+
+def _is_numeric(array):
+    return np.issubdtype(array.dtype, np.number)
+
+
+class DataFrameTableModel(QAbstractTableModel):
+    """
+    Model tabeli danych treningowych czytający wprost z tablic kolumn DataFrame – tekst komórki
+    powstaje dopiero przy jej wyświetleniu. Kolejność wierszy to tablica identyfikatorów wierszy
+    (dodawanie, usuwanie i przesuwanie nie kopiuje kolumn), a edycje trzymamy osobno jako
+    teksty brudnych komórek – przy zapisie konwertowane są tylko one.
+    """
+    def __init__(self, data=None, parent=None):
+        super().__init__(parent)
+        self.set_data(pd.DataFrame() if data is None else data)
+
+    def set_data(self, data):
+        self.beginResetModel()
+        self.columns = list(data.columns)
+        self._arrays = [data[name].to_numpy() for name in self.columns]
+        self._base_rows = len(data)
+        self._order = np.arange(len(data), dtype=np.int64)  # wiersz widoku -> identyfikator wiersza
+        self._next_row = len(data)  # identyfikatory >= _base_rows to wiersze dodane w edytorze
+        self._edits = {}            # (identyfikator wiersza, kolumna) -> tekst
+        self._rows_changed = False
+        self.endResetModel()
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self._order)
+
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.columns)
+
+    def headerData(self, section, orientation, role=Qt.DisplayRole):
+        if role == Qt.DisplayRole and orientation == Qt.Horizontal:
+            return str(self.columns[section])
+        return super().headerData(section, orientation, role)
+
+    def flags(self, index):
+        if not index.isValid():
+            return Qt.NoItemFlags
+        return Qt.ItemIsEnabled | Qt.ItemIsSelectable | Qt.ItemIsEditable
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid() or role not in (Qt.DisplayRole, Qt.EditRole):
+            return None
+        row_id = int(self._order[index.row()])
+        text = self._edits.get((row_id, index.column()))
+        if text is not None:
+            return text
+        if row_id >= self._base_rows:
+            return ""
+        return str(self._arrays[index.column()][row_id])
+
+    def setData(self, index, value, role=Qt.EditRole):
+        if role != Qt.EditRole or not index.isValid():
+            return False
+        text = str(value).strip()
+        # W kolumnach liczbowych odrzucamy od razu wartości, których nie da się zamienić na liczbę
+        if text and _is_numeric(self._arrays[index.column()]):
+            try:
+                parse_decimal_input(text)
+            except ValueError:
+                return False
+        self._edits[(int(self._order[index.row()]), index.column())] = text
+        self.dataChanged.emit(index, index)
+        return True
+
+    def is_dirty(self):
+        return bool(self._edits) or self._rows_changed
+
+    def insert_row(self):
+        """Dodaje pusty wiersz na końcu i zwraca jego numer."""
+        row = len(self._order)
+        self.beginInsertRows(QModelIndex(), row, row)
+        self._order = np.append(self._order, self._next_row)
+        self._next_row += 1
+        self._rows_changed = True
+        self.endInsertRows()
+        return row
+
+    def remove_rows(self, rows):
+        for row in sorted(set(rows), reverse=True):
+            self.beginRemoveRows(QModelIndex(), row, row)
+            self._order = np.delete(self._order, row)
+            self._rows_changed = True
+            self.endRemoveRows()
+
+    def swap_rows(self, row1, row2):
+        self._order[[row1, row2]] = self._order[[row2, row1]]
+        self._rows_changed = True
+        last_column = len(self.columns) - 1
+        for row in (row1, row2):
+            self.dataChanged.emit(self.index(row, 0), self.index(row, last_column))
+
+    def to_dataframe(self):
+        """
+        Dane w bieżącej kolejności wierszy. Kolumny składane są z tablic źródłowych (wektorowo),
+        a safe_to_numeric stosowany jest wyłącznie do edytowanych komórek.
+        Nieedytowane komórki nowych wierszy: NaN w kolumnach liczbowych, pusty tekst w pozostałych.
+        """
+        ids = self._order
+        existing = ids < self._base_rows
+        columns = {}
+        for array, name in zip(self._arrays, self.columns):
+            if _is_numeric(array):
+                values = np.full(len(ids), np.nan, dtype=np.float64)
+            else:
+                values = np.full(len(ids), "", dtype=object)
+            values[existing] = array[ids[existing]]
+            columns[name] = values
+
+        position = np.full(self._next_row, -1, dtype=np.int64)
+        position[ids] = np.arange(len(ids))
+        for (row_id, column), text in self._edits.items():
+            row = position[row_id]
+            if row < 0:
+                continue  # wiersz usunięty po edycji
+            name = self.columns[column]
+            values = columns[name]
+            value = safe_to_numeric(text) if text else ("" if values.dtype == object else np.nan)
+            if isinstance(value, str) and values.dtype != object:
+                values = columns[name] = values.astype(object)
+            values[row] = value
+        return pd.DataFrame(columns, columns=self.columns)
@@ -0,0 +1,304 @@
+# data/dxf_cache.py
+import hashlib
+import json
+import os
+import shutil
+import threading
+import numpy as np
+from data.dxf_geometry import BENDING_COLOR, GeometryBatch
+
+DXF_CACHE_DIR = "dxf_cache"
+
+# Podbijamy przy każdej zmianie konwersji encji lub układu plików – starsze wpisy są wtedy pomijane
+CACHE_FORMAT = 3
+
+# Prymitywy o stałej liczbie kolumn: nazwa -> (liczba kolumn, przedrostek tablic stylu i właściciela)
+PRIMITIVES = {
+    "lines": (4, "line"),        # x1, y1, x2, y2
+    "arcs": (5, "arc"),          # cx, cy, r, kąt_początkowy, rozpiętość
+    "circles": (3, "circle"),    # cx, cy, r
+    "inserts": (6, "insert"),    # m11, m12, m21, m22, dx, dy
+}
+
+# Wszystkie tablice wpisu. *_styles – indeks pary (warstwa, kolor) w meta["styles"],
+# *_blocks – indeks bloku w meta["blocks"] (-1 = przestrzeń modelu), insert_names – blok wstawiany.
+# Łamane: punkty wszystkich łamanych jedna po drugiej oraz przesunięcia początków (n + 1).
+# Linie gięcia: współrzędne i styl (warstwa); opisy TEXT/MTEXT trzymamy w meta["texts"].
+ARRAYS = (
+    [name for name in PRIMITIVES]
+    + [f"{prefix}_{kind}" for _, prefix in PRIMITIVES.values() for kind in ("styles", "blocks")]
+    + ["insert_names", "polyline_points", "polyline_offsets", "polyline_styles", "polyline_blocks",
+       "bending_lines", "bending_styles"]
+)
+
+
+def file_content_hash(file_path, chunk_size=1 << 20):
+    digest = hashlib.sha256()
+    with open(file_path, "rb") as file:
+        for chunk in iter(lambda: file.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def file_signature(file_path):
+    """(rozmiar, mtime_ns, sha256) pliku – pobierany przed parsowaniem, aby zmiana w trakcie unieważniła wpis."""
+    stat = os.stat(file_path)
+    return stat.st_size, stat.st_mtime_ns, file_content_hash(file_path)
+
+
+def _directory_size(path):
+    return sum(entry.stat().st_size for entry in os.scandir(path) if entry.is_file())
+
+
+def _rows_by_owner(owners, count):
+    """Indeksy wierszy pogrupowane wg właściciela: lista count + 1 tablic (najpierw przestrzeń modelu)."""
+    owners = np.asarray(owners)
+    order = np.argsort(owners, kind='stable')
+    bounds = np.searchsorted(owners[order], np.arange(-1, count + 1))
+    return [order[bounds[i]:bounds[i + 1]] for i in range(count + 1)]
+
+
+class CachedGeometry:
+    """Geometria rysunku wczytana z pamięci podręcznej (tablice NumPy, domyślnie mapowane z dysku)."""
+    def __init__(self, arrays, meta):
+        self.arrays = arrays
+        self.meta = meta
+        self.styles = [tuple(style) for style in meta["styles"]]
+        self.block_names = list(meta["blocks"])
+
+    def __len__(self):
+        return (sum(len(self.arrays[name]) for name in PRIMITIVES)
+                + len(self.arrays["polyline_styles"]) + len(self.arrays["bending_lines"]))
+
+    def _fill(self, batch, rows_by_kind):
+        """Dopisuje do paczki wskazane wiersze każdego rodzaju prymitywów."""
+        for name, (_, prefix) in PRIMITIVES.items():
+            rows = rows_by_kind.get(name)
+            if rows is None or len(rows) == 0:
+                continue
+            values = np.asarray(self.arrays[name][rows]).tolist()
+            styles = [self.styles[code] for code in np.asarray(self.arrays[f"{prefix}_styles"][rows]).tolist()]
+            if name == "inserts":
+                block_names = [self.block_names[i] for i in np.asarray(self.arrays["insert_names"][rows]).tolist()]
+                styles = [style + (block_name,) for style, block_name in zip(styles, block_names)]
+            getattr(batch, name).extend(style + tuple(row) for style, row in zip(styles, values))
+
+        rows = rows_by_kind.get("polylines")
+        if rows is not None and len(rows):
+            offsets = self.arrays["polyline_offsets"]
+            points = self.arrays["polyline_points"]
+            for i in np.asarray(rows).tolist():
+                style = self.styles[int(self.arrays["polyline_styles"][i])]
+                batch.polylines.append(style + (np.asarray(points[offsets[i]:offsets[i + 1]]),))
+
+    def iter_batches(self, batch_size=2000, cancel_event=None):
+        """Odtwarza paczki GeometryBatch jako krotki (paczka, przetworzone, wszystkie), jak iter_dxf_batches."""
+        total = max(len(self), 1)
+        block_count = len(self.block_names)
+        owners = {name: _rows_by_owner(self.arrays[f"{prefix}_blocks"], block_count)
+                  for name, (_, prefix) in PRIMITIVES.items()}
+        owners["polylines"] = _rows_by_owner(self.arrays["polyline_blocks"], block_count)
+
+        # Definicje bloków w pierwszej paczce – przed wstawieniami, które się do nich odwołują
+        if block_count:
+            batch = GeometryBatch()
+            for index, name in enumerate(self.block_names):
+                block_geometry = GeometryBatch()
+                self._fill(block_geometry, {kind: rows[index + 1] for kind, rows in owners.items()})
+                batch.blocks.append((name, block_geometry))
+            yield batch, 0, total
+
+        processed = 0
+        for kind, rows in owners.items():
+            model_rows = rows[0]
+            for start in range(0, len(model_rows), batch_size):
+                if cancel_event is not None and cancel_event.is_set():
+                    return
+                batch = GeometryBatch()
+                chunk = model_rows[start:start + batch_size]
+                self._fill(batch, {kind: chunk})
+                processed += len(chunk)
+                yield batch, processed, total
+
+        bending = self.arrays["bending_lines"]
+        bending_styles = self.arrays["bending_styles"]
+        for start in range(0, len(bending), batch_size):
+            if cancel_event is not None and cancel_event.is_set():
+                return
+            batch = GeometryBatch()
+            rows = np.asarray(bending[start:start + batch_size]).tolist()
+            codes = np.asarray(bending_styles[start:start + batch_size]).tolist()
+            batch.bending_lines = [(self.styles[code][0],) + tuple(row) for code, row in zip(codes, rows)]
+            processed += len(batch.bending_lines)
+            yield batch, processed, total
+        batch = GeometryBatch()
+        batch.texts = [tuple(text) for text in self.meta.get("texts", [])]
+        yield batch, total, total
+
+
+class DxfGeometryCache:
+    """
+    Trwała pamięć podręczna przekonwertowanej geometrii DXF.
+    Wpis (katalog nazwany skrótem ścieżki pliku) zawiera tablice .npy oraz meta.json z rozmiarem,
+    czasem modyfikacji i skrótem SHA-256 treści pliku. Zgodny rozmiar i mtime wystarczają do trafienia;
+    przy innym mtime porównywany jest skrót treści. Najdawniej używane wpisy są usuwane po przekroczeniu limitu.
+    """
+    def __init__(self, cache_dir=DXF_CACHE_DIR, size_limit=200 * 1024 * 1024):
+        self.cache_dir = cache_dir
+        self.size_limit = size_limit
+
+    def _entry_dir(self, file_path):
+        path_key = os.path.normcase(os.path.abspath(file_path))
+        return os.path.join(self.cache_dir, hashlib.sha256(path_key.encode("utf-8")).hexdigest()[:24])
+
+    def _read_meta(self, entry_dir):
+        try:
+            with open(os.path.join(entry_dir, "meta.json"), "r", encoding="utf-8") as file:
+                return json.load(file)
+        except (OSError, ValueError):
+            return None
+
+    def load(self, file_path, mmap=True):
+        """Zwraca CachedGeometry dla aktualnej zawartości pliku albo None (brak lub nieaktualny wpis)."""
+        entry_dir = self._entry_dir(file_path)
+        meta = self._read_meta(entry_dir)
+        if meta is None or meta.get("format") != CACHE_FORMAT:
+            return None
+        try:
+            stat = os.stat(file_path)
+            if stat.st_size != meta["size"]:
+                return None
+            if stat.st_mtime_ns != meta["mtime_ns"]:
+                # Plik dotknięty (np. skopiowany ponownie) – decyduje treść
+                if file_content_hash(file_path) != meta["sha256"]:
+                    return None
+                meta["mtime_ns"] = stat.st_mtime_ns
+                self._write_meta(entry_dir, meta)
+
+            mmap_mode = "r" if mmap else None
+            arrays = {name: np.load(os.path.join(entry_dir, f"{name}.npy"), mmap_mode=mmap_mode)
+                      for name in ARRAYS}
+            os.utime(entry_dir)  # kolejność usuwania wg ostatniego użycia
+        except (OSError, ValueError, KeyError) as e:
+            print(f"Pominięto uszkodzony wpis pamięci podręcznej DXF: {e}")
+            return None
+
+        print(f"Geometria DXF z pamięci podręcznej: {file_path}")
+        return CachedGeometry(arrays, meta)
+
+    def _write_meta(self, entry_dir, meta):
+        meta_path = os.path.join(entry_dir, "meta.json")
+        with open(f"{meta_path}.tmp", "w", encoding="utf-8") as file:
+            json.dump(meta, file, indent=4)
+        os.replace(f"{meta_path}.tmp", meta_path)
+
+    def store(self, file_path, signature, batches, entity_count):
+        """
+        Zapisuje geometrię (lista GeometryBatch) atomowo – przez katalog tymczasowy przemianowywany na wpis.
+        signature – wynik file_signature() pobrany przed parsowaniem pliku.
+        """
+        styles = {}
+        block_index = {}
+        columns = {name: [] for name in ARRAYS}
+        polyline_points = []
+        texts = []
+
+        def add(geometry, owner):
+            for name, (_, prefix) in PRIMITIVES.items():
+                for row in getattr(geometry, name):
+                    columns[f"{prefix}_styles"].append(styles.setdefault(tuple(row[:2]), len(styles)))
+                    columns[f"{prefix}_blocks"].append(owner)
+                    if name == "inserts":
+                        columns["insert_names"].append(block_index.setdefault(row[2], len(block_index)))
+                        columns[name].append(row[3:])
+                    else:
+                        columns[name].append(row[2:])
+            for layer, color, points in geometry.polylines:
+                columns["polyline_styles"].append(styles.setdefault((layer, color), len(styles)))
+                columns["polyline_blocks"].append(owner)
+                columns["polyline_offsets"].append(len(points))
+                polyline_points.append(np.asarray(points, dtype=np.float64).reshape(-1, 2))
+
+        for batch in batches:
+            for name, block_geometry in batch.blocks:
+                add(block_geometry, block_index.setdefault(name, len(block_index)))
+            add(batch, -1)
+            for layer, *coords in batch.bending_lines:
+                columns["bending_styles"].append(styles.setdefault((layer, BENDING_COLOR), len(styles)))
+                columns["bending_lines"].append(coords)
+            texts.extend([text, x, y] for text, x, y in batch.texts)
+
+        arrays = {}
+        for name, (width, prefix) in PRIMITIVES.items():
+            arrays[name] = np.asarray(columns[name], dtype=np.float64).reshape(-1, width)
+            for kind in ("styles", "blocks"):
+                arrays[f"{prefix}_{kind}"] = np.asarray(columns[f"{prefix}_{kind}"], dtype=np.int32)
+        arrays["insert_names"] = np.asarray(columns["insert_names"], dtype=np.int32)
+        arrays["polyline_points"] = (np.concatenate(polyline_points) if polyline_points
+                                     else np.empty((0, 2), dtype=np.float64))
+        arrays["polyline_offsets"] = np.concatenate(([0], np.cumsum(columns["polyline_offsets"], dtype=np.int64)))
+        arrays["polyline_styles"] = np.asarray(columns["polyline_styles"], dtype=np.int32)
+        arrays["polyline_blocks"] = np.asarray(columns["polyline_blocks"], dtype=np.int32)
+        arrays["bending_lines"] = np.asarray(columns["bending_lines"], dtype=np.float64).reshape(-1, 4)
+        arrays["bending_styles"] = np.asarray(columns["bending_styles"], dtype=np.int32)
+
+        size, mtime_ns, sha256 = signature
+        meta = {
+            "format": CACHE_FORMAT,
+            "path": os.path.abspath(file_path),
+            "size": size,
+            "mtime_ns": mtime_ns,
+            "sha256": sha256,
+            "entities": entity_count,
+            "styles": [list(style) for style in sorted(styles, key=styles.get)],
+            "blocks": sorted(block_index, key=block_index.get),
+            "texts": texts,
+        }
+
+        entry_dir = self._entry_dir(file_path)
+        tmp_dir = f"{entry_dir}.tmp-{os.getpid()}-{threading.get_ident()}"
+        try:
+            os.makedirs(tmp_dir, exist_ok=True)
+            for name, array in arrays.items():
+                np.save(os.path.join(tmp_dir, f"{name}.npy"), array)
+            self._write_meta(tmp_dir, meta)
+            if os.path.isdir(entry_dir):
+                shutil.rmtree(entry_dir)
+            os.replace(tmp_dir, entry_dir)
+        except OSError as e:
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+            print(f"Nie udało się zapisać geometrii DXF do pamięci podręcznej: {e}")
+            return
+        self.evict(keep=entry_dir)
+
+    def evict(self, keep=None):
+        """Usuwa najdawniej używane wpisy, aż pamięć podręczna zmieści się w limicie rozmiaru."""
+        if not os.path.isdir(self.cache_dir):
+            return
+        # Wpisy mogą znikać w trakcie – pamięć podręczną czyszczą też inne procesy (np. batch.py)
+        entries = []
+        for entry in os.scandir(self.cache_dir):
+            try:
+                if entry.is_dir() and ".tmp-" not in entry.name:
+                    entries.append((entry.stat().st_mtime, entry.path, _directory_size(entry.path)))
+            except OSError:
+                continue
+
+        total = sum(size for _, _, size in entries)
+        for _, path, size in sorted(entries):
+            if total <= self.size_limit:
+                break
+            try:
+                if keep is not None and os.path.samefile(path, keep):
+                    continue
+            except OSError:
+                continue
+            shutil.rmtree(path, ignore_errors=True)
+            total -= size
+            print(f"Usunięto wpis pamięci podręcznej DXF: {os.path.basename(path)}")
+
+    def clear(self):
+        shutil.rmtree(self.cache_dir, ignore_errors=True)
+
+
+dxf_geometry_cache = DxfGeometryCache()
@@ -0,0 +1,434 @@
+# data/dxf_geometry.py
+import math
+from collections import Counter
+import numpy as np
+
+BENDING_COLOR = 2
+
+# Maksymalna odchyłka cięciwy od krzywej [jednostki rysunku] przy zamianie krzywych na łamane
+CHORD_TOLERANCE = 0.05
+MAX_ARC_SEGMENTS = 256
+MAX_BLOCK_DEPTH = 16
+
+
+class GeometryBatch:
+    """Paczka prymitywów odczytanych z DXF w postaci zwykłych współrzędnych (bez obiektów Qt)."""
+    def __init__(self):
+        self.lines = []          # (warstwa, kolor, x1, y1, x2, y2)
+        self.arcs = []           # (warstwa, kolor, cx, cy, r, kąt_początkowy, rozpiętość) – stopnie, przeciwnie do zegara
+        self.circles = []        # (warstwa, kolor, cx, cy, r)
+        self.polylines = []      # (warstwa, kolor, punkty) – punkty: tablica NumPy (n, 2)
+        self.bending_lines = []  # (warstwa, x1, y1, x2, y2)
+        self.texts = []          # (tekst, x, y) – opisy TEXT/MTEXT (np. kąty gięcia), nie są rysowane
+        self.blocks = []         # (nazwa, GeometryBatch) – definicje bloków przed ich pierwszym użyciem
+        self.inserts = []        # (warstwa, kolor, nazwa_bloku, m11, m12, m21, m22, dx, dy) – jak QTransform
+
+    def __len__(self):
+        return (len(self.lines) + len(self.arcs) + len(self.circles) + len(self.polylines)
+                + len(self.bending_lines) + len(self.inserts))
+
+
+def flatten_bulge_polyline(points, bulges, closed=False, tolerance=CHORD_TOLERANCE):
+    """
+    Zamienia łamaną z wybrzuszeniami (bulge) na łamaną prostych odcinków.
+    Wszystkie segmenty liczone są wektorowo: łuk o kącie środkowym 4*atan(bulge) dzielimy na tyle
+    odcinków, by strzałka cięciwy nie przekraczała tolerance. Zwraca tablicę (n, 2).
+    """
+    points = np.asarray(points, dtype=float).reshape(-1, 2)
+    bulges = np.asarray(bulges, dtype=float).ravel()
+    if len(points) < 2:
+        return points.copy()
+
+    if closed:
+        starts, ends = points, np.roll(points, -1, axis=0)
+    else:
+        starts, ends, bulges = points[:-1], points[1:], bulges[:-1]
+
+    chord_vec = ends - starts
+    chord = np.hypot(chord_vec[:, 0], chord_vec[:, 1])
+    is_arc = (np.abs(bulges) > 1e-12) & (chord > 0)
+
+    theta = 4 * np.arctan(bulges)
+    safe_bulge = np.where(is_arc, bulges, 1.0)
+    safe_chord = np.where(chord > 0, chord, 1.0)
+    radius = np.where(is_arc, chord / np.where(is_arc, 2 * np.abs(np.sin(theta / 2)), 1.0), 0.0)
+
+    # Środek łuku: od środka cięciwy wzdłuż normalnej (w lewo od kierunku segmentu)
+    normal = np.stack((-chord_vec[:, 1], chord_vec[:, 0]), axis=1) / safe_chord[:, None]
+    offset = chord * (1 - safe_bulge ** 2) / (4 * safe_bulge)
+    centers = (starts + ends) / 2 + normal * offset[:, None]
+    start_angles = np.arctan2(starts[:, 1] - centers[:, 1], starts[:, 0] - centers[:, 0])
+
+    step = 2 * np.arccos(np.clip(1 - tolerance / np.where(is_arc, radius, 1.0), -1.0, 1.0))
+    counts = np.where(is_arc, np.ceil(np.abs(theta) / np.maximum(step, 1e-9)), 1)
+    counts = np.clip(counts, 1, MAX_ARC_SEGMENTS).astype(np.int64)
+
+    # Każdy segment daje swoje punkty bez końcowego – końcowy jest początkiem następnego
+    segment = np.repeat(np.arange(len(starts)), counts)
+    first = np.cumsum(counts) - counts
+    frac = (np.arange(counts.sum()) - np.repeat(first, counts)) / counts[segment]
+    angles = start_angles[segment] + theta[segment] * frac
+    arc_points = centers[segment] + radius[segment, None] * np.stack((np.cos(angles), np.sin(angles)), axis=1)
+    line_points = starts[segment] + chord_vec[segment] * frac[:, None]
+    result = np.where(is_arc[segment, None], arc_points, line_points)
+    return np.vstack((result, ends[-1:]))
+
+
+def flatten_ellipse(center, major_axis, minor_axis, start_param, end_param, tolerance=CHORD_TOLERANCE):
+    """Punkty łuku elipsy (parametry w radianach, przeciwnie do zegara) – tablica (n, 2)."""
+    span = (end_param - start_param) % (2 * math.pi)
+    if span <= 1e-12:
+        span = 2 * math.pi
+    radius = max(math.hypot(*major_axis), math.hypot(*minor_axis), 1e-12)
+    step = 2 * math.acos(max(min(1 - tolerance / radius, 1.0), -1.0))
+    count = int(min(max(math.ceil(span / max(step, 1e-9)), 4), MAX_ARC_SEGMENTS * 4))
+    t = start_param + np.linspace(0.0, span, count + 1)
+    cos_t, sin_t = np.cos(t)[:, None], np.sin(t)[:, None]
+    return np.asarray(center, dtype=float) + cos_t * np.asarray(major_axis) + sin_t * np.asarray(minor_axis)
+
+
+def bspline_points(control_points, knots, degree, t, weights=None):
+    """Wektorowe wyznaczenie punktów krzywej B-sklejanej (NURBS, gdy podano wagi) dla tablicy parametrów t."""
+    control_points = np.asarray(control_points, dtype=float)
+    knots = np.asarray(knots, dtype=float)
+    t = np.clip(np.asarray(t, dtype=float), knots[degree], knots[len(control_points)])
+    n_spans = len(knots) - 1
+
+    # Funkcje bazowe stopnia 0; koniec dziedziny przypisujemy ostatniemu niezerowemu przedziałowi
+    basis = ((knots[:-1] <= t[:, None]) & (t[:, None] < knots[1:])).astype(float)
+    last_span = np.nonzero(knots[:len(control_points)] < knots[1:len(control_points) + 1])[0][-1]
+    basis[t >= knots[last_span + 1], last_span] = 1.0
+
+    for k in range(1, degree + 1):
+        i = np.arange(n_spans - k)
+        left_den = knots[i + k] - knots[i]
+        right_den = knots[i + k + 1] - knots[i + 1]
+        with np.errstate(divide='ignore', invalid='ignore'):
+            left = np.where(left_den > 0, (t[:, None] - knots[i]) / left_den, 0.0)
+            right = np.where(right_den > 0, (knots[i + k + 1] - t[:, None]) / right_den, 0.0)
+        basis = left * basis[:, :-1] + right * basis[:, 1:]
+
+    if weights is not None and len(weights):
+        weighted = basis * np.asarray(weights, dtype=float)
+        return (weighted @ control_points) / weighted.sum(axis=1, keepdims=True)
+    return basis @ control_points
+
+
+def flatten_bspline(control_points, knots, degree, weights=None, tolerance=CHORD_TOLERANCE, max_rounds=12):
+    """
+    Zamienia krzywą B-sklejaną na łamaną z odchyłką ~tolerance: zaczynamy od kilku punktów na przedział
+    węzłów i w każdej rundzie dzielimy (wektorowo) tylko te odcinki, których środek odstaje od cięciwy.
+    """
+    knots = np.asarray(knots, dtype=float)
+    domain_knots = np.unique(knots[degree:len(control_points) + 1])
+    if len(domain_knots) < 2:
+        return np.asarray(control_points, dtype=float)[:, :2]
+    t = np.unique(np.concatenate([np.linspace(a, b, 4, endpoint=False)
+                                  for a, b in zip(domain_knots[:-1], domain_knots[1:])] + [domain_knots[-1:]]))
+    points = bspline_points(control_points, knots, degree, t, weights)
+
+    for _ in range(max_rounds):
+        t_mid = (t[:-1] + t[1:]) / 2
+        mid_points = bspline_points(control_points, knots, degree, t_mid, weights)
+        deviation = np.hypot(*(mid_points - (points[:-1] + points[1:]) / 2).T)
+        split = deviation > tolerance
+        if not split.any():
+            break
+        t_all = np.concatenate((t, t_mid[split]))
+        order = np.argsort(t_all, kind='stable')
+        t = t_all[order]
+        points = np.concatenate((points, mid_points[split]))[order]
+    return points
+
+
+def _compose(parent, child):
+    """Złożenie przekształceń afinicznych (m11, m12, m21, m22, dx, dy): najpierw child, potem parent."""
+    a, b, c, d, tx, ty = parent
+    ca, cb, cc, cd, ctx, cty = child
+    return (a * ca + c * cb, b * ca + d * cb,
+            a * cc + c * cd, b * cc + d * cd,
+            a * ctx + c * cty + tx, b * ctx + d * cty + ty)
+
+
+def _apply(transform, x, y):
+    a, b, c, d, tx, ty = transform
+    return a * x + c * y + tx, b * x + d * y + ty
+
+
+def _arc_extreme_points(arcs):
+    """Końce łuków i ich punkty na osiach (0°, 90°, 180°, 270°) leżące w rozpiętości – tablica (n, 2)."""
+    cx, cy, r, start, span = (arcs[:, i] for i in range(5))
+    angles = [start, start + span]
+    masks = [np.ones(len(arcs), dtype=bool)] * 2
+    for axis_angle in (0.0, 90.0, 180.0, 270.0):
+        angles.append(np.full(len(arcs), axis_angle))
+        masks.append((axis_angle - start) % 360.0 <= span)
+    radians = np.radians(np.concatenate(angles))
+    mask = np.concatenate(masks)
+    x = np.tile(cx, len(angles)) + np.tile(r, len(angles)) * np.cos(radians)
+    y = np.tile(cy, len(angles)) + np.tile(r, len(angles)) * np.sin(radians)
+    return np.column_stack((x[mask], y[mask]))
+
+
+class GeometryBounds:
+    """
+    Prostokąt otaczający geometrię rysunku (min_x, min_y, max_x, max_y), aktualizowany kolejnymi
+    paczkami – bez grubości pióra, więc wspólny dla widoku i trybu wsadowego.
+    Instancje bloków liczone są z narożników prostokąta definicji po przekształceniu.
+    """
+    def __init__(self):
+        self.rect = None
+        self._block_rects = {}
+
+    def update(self, batch):
+        for name, geometry in batch.blocks:
+            self._block_rects[name] = self._extent(geometry)
+        rect = self._extent(batch)
+        if rect is not None:
+            self._include(rect)
+
+    def _include(self, rect):
+        if self.rect is None:
+            self.rect = rect
+        else:
+            self.rect = (min(self.rect[0], rect[0]), min(self.rect[1], rect[1]),
+                         max(self.rect[2], rect[2]), max(self.rect[3], rect[3]))
+
+    def _extent(self, batch):
+        points = []
+        if batch.lines:
+            rows = np.asarray([row[2:] for row in batch.lines], dtype=float)
+            points += [rows[:, :2], rows[:, 2:]]
+        if batch.bending_lines:
+            rows = np.asarray([row[1:] for row in batch.bending_lines], dtype=float)
+            points += [rows[:, :2], rows[:, 2:]]
+        if batch.circles:
+            rows = np.asarray([row[2:] for row in batch.circles], dtype=float)
+            points += [rows[:, :2] - rows[:, 2:3], rows[:, :2] + rows[:, 2:3]]
+        if batch.arcs:
+            points.append(_arc_extreme_points(np.asarray([row[2:] for row in batch.arcs], dtype=float)))
+        points += [np.asarray(row[2], dtype=float).reshape(-1, 2) for row in batch.polylines]
+        for row in batch.inserts:
+            rect = self._block_rects.get(row[2])
+            if rect is not None:
+                corners = [(rect[0], rect[1]), (rect[0], rect[3]), (rect[2], rect[1]), (rect[2], rect[3])]
+                points.append(np.asarray([_apply(row[3:], x, y) for x, y in corners]))
+        if not points:
+            return None
+        points = np.concatenate(points)
+        if len(points) == 0:
+            return None
+        min_x, min_y = points.min(axis=0)
+        max_x, max_y = points.max(axis=0)
+        return float(min_x), float(min_y), float(max_x), float(max_y)
+
+
+class _BlockDefinition:
+    def __init__(self):
+        self.geometry = GeometryBatch()
+        self.children = []  # (nazwa bloku, przekształcenie względem tego bloku)
+
+
+class DxfConverter:
+    """
+    Konwersja encji DXF na prymitywy GeometryBatch. Definicje bloków konwertowane są raz,
+    a każdy INSERT (także zagnieżdżony) daje jedynie wpis instancji z przekształceniem.
+    """
+    def __init__(self, doc, tolerance=CHORD_TOLERANCE):
+        self.doc = doc
+        self.tolerance = tolerance
+        self.unsupported = Counter()
+        self._definitions = {}
+        self._emitted_blocks = set()
+
+    def convert(self, entity, batch):
+        if entity.dxftype() == 'INSERT':
+            for name, transform in self._insert_instances(entity):
+                self._emit_instance(entity, name, transform, batch)
+        else:
+            self._convert_primitive(entity, batch)
+
+    # --- bloki ---
+
+    @staticmethod
+    def _insert_transforms(entity):
+        inserts = entity.multi_insert() if entity.mcount > 1 else [entity]
+        for insert in inserts:
+            m = insert.matrix44()
+            ux, uy, origin = m.ux, m.uy, m.origin
+            yield (ux.x, ux.y, uy.x, uy.y, origin.x, origin.y)
+
+    def _insert_instances(self, entity):
+        """(nazwa bloku, przekształcenie) dla INSERT i wszystkich bloków w nim zagnieżdżonych."""
+        name = entity.dxf.name
+        if self._definition(name, depth=0) is None:
+            return
+        for transform in self._insert_transforms(entity):
+            yield from self._expand(name, transform, depth=0)
+
+    def _expand(self, name, transform, depth):
+        definition = self._definitions.get(name)
+        if definition is None:
+            return
+        yield name, transform
+        if depth >= MAX_BLOCK_DEPTH:
+            return
+        for child_name, child_transform in definition.children:
+            yield from self._expand(child_name, _compose(transform, child_transform), depth + 1)
+
+    def _definition(self, name, depth):
+        if name in self._definitions:
+            return self._definitions[name]
+        block = self.doc.blocks.get(name)
+        if block is None or depth >= MAX_BLOCK_DEPTH:
+            self.unsupported[f"INSERT ({name})"] += 1
+            return None
+
+        definition = _BlockDefinition()
+        self._definitions[name] = definition
+        for entity in block:
+            if entity.dxftype() == 'INSERT':
+                child = entity.dxf.name
+                if self._definition(child, depth + 1) is not None:
+                    definition.children.extend((child, t) for t in self._insert_transforms(entity))
+            else:
+                self._convert_primitive(entity, definition.geometry)
+        return definition
+
+    def _emit_instance(self, entity, name, transform, batch):
+        geometry = self._definitions[name].geometry
+        if len(geometry) > len(geometry.bending_lines):
+            if name not in self._emitted_blocks:
+                self._emitted_blocks.add(name)
+                block_geometry = GeometryBatch()
+                block_geometry.lines = geometry.lines
+                block_geometry.arcs = geometry.arcs
+                block_geometry.circles = geometry.circles
+                block_geometry.polylines = geometry.polylines
+                batch.blocks.append((name, block_geometry))
+            layer = entity.dxf.get('layer', '0')
+            color = entity.dxf.get('color', 256)
+            batch.inserts.append((layer, color, name) + tuple(transform))
+        # Linie gięcia z bloków muszą być osobnymi elementami – przenosimy je do układu rysunku
+        for layer, x1, y1, x2, y2 in geometry.bending_lines:
+            batch.bending_lines.append((layer,) + _apply(transform, x1, y1) + _apply(transform, x2, y2))
+        for text, x, y in geometry.texts:
+            batch.texts.append((text,) + _apply(transform, x, y))
+
+    # --- prymitywy ---
+
+    def _convert_primitive(self, entity, batch):
+        dxftype = entity.dxftype()
+        layer = entity.dxf.get('layer', '0')
+        color = entity.dxf.get('color', 256)
+        # Encje OCS z osią Z skierowaną w dół (lustrzane odbicie) – odwracamy oś X
+        mirrored = entity.dxf.hasattr('extrusion') and entity.dxf.extrusion.z < 0
+        sign = -1.0 if mirrored else 1.0
+
+        if dxftype == 'LINE':
+            start, end = entity.dxf.start, entity.dxf.end
+            if color == BENDING_COLOR:
+                batch.bending_lines.append((layer, start.x, start.y, end.x, end.y))
+            else:
+                batch.lines.append((layer, color, start.x, start.y, end.x, end.y))
+        elif dxftype == 'CIRCLE':
+            center = entity.dxf.center
+            batch.circles.append((layer, color, sign * center.x, center.y, entity.dxf.radius))
+        elif dxftype == 'ARC':
+            center = entity.dxf.center
+            start_angle = entity.dxf.start_angle
+            end_angle = entity.dxf.end_angle
+            if mirrored:
+                start_angle, end_angle = 180.0 - end_angle, 180.0 - start_angle
+            # Łuk DXF biegnie zawsze przeciwnie do ruchu wskazówek zegara od kąta początkowego do końcowego
+            span = (end_angle - start_angle) % 360.0 or 360.0
+            batch.arcs.append((layer, color, sign * center.x, center.y, entity.dxf.radius, start_angle, span))
+        elif dxftype == 'LWPOLYLINE':
+            # points() w LWPOLYLINE jest menedżerem kontekstu – get_points zwraca gotową listę (x, y, bulge)
+            values = np.asarray(entity.get_points('xyb'), dtype=float).reshape(-1, 3)
+            self._add_bulge_polyline(layer, color, values, entity.closed, sign, batch)
+        elif dxftype == 'POLYLINE':
+            if entity.is_2d_polyline:
+                values = np.asarray([(v.dxf.location.x, v.dxf.location.y, v.dxf.get('bulge', 0.0))
+                                     for v in entity.vertices], dtype=float).reshape(-1, 3)
+                self._add_bulge_polyline(layer, color, values, entity.is_closed, sign, batch)
+            else:
+                points = np.asarray([(p[0], p[1]) for p in entity.points()], dtype=float).reshape(-1, 2)
+                if entity.is_closed and len(points) > 2:
+                    points = np.vstack((points, points[:1]))
+                if len(points) > 1:
+                    batch.polylines.append((layer, color, points))
+        elif dxftype == 'ELLIPSE':
+            center, major, minor = entity.dxf.center, entity.dxf.major_axis, entity.minor_axis
+            points = flatten_ellipse((center.x, center.y), (major.x, major.y), (minor.x, minor.y),
+                                     entity.dxf.start_param, entity.dxf.end_param, self.tolerance)
+            batch.polylines.append((layer, color, points))
+        elif dxftype == 'SPLINE':
+            spline = entity.construction_tool()
+            control_points = np.asarray([(p.x, p.y) for p in spline.control_points], dtype=float)
+            weights = spline.weights() if spline.is_rational else None
+            points = flatten_bspline(control_points, spline.knots(), spline.degree, weights, self.tolerance)
+            if len(points) > 1:
+                batch.polylines.append((layer, color, points))
+        elif dxftype in ('TEXT', 'MTEXT'):
+            text = entity.plain_text().strip()
+            insert = entity.dxf.insert
+            # Punkt wstawienia TEXT jest w OCS, MTEXT – w układzie rysunku
+            x = sign * insert.x if dxftype == 'TEXT' else insert.x
+            if text:
+                batch.texts.append((text, x, insert.y))
+        else:
+            self.unsupported[dxftype] += 1
+
+    def _add_bulge_polyline(self, layer, color, values, closed, sign, batch):
+        if len(values) < 2:
+            return
+        xy = values[:, :2] * (sign, 1.0)
+        # W układzie lustrzanym łuki zmieniają kierunek
+        points = flatten_bulge_polyline(xy, sign * values[:, 2], closed, self.tolerance)
+        batch.polylines.append((layer, color, points))
+
+
+def iter_dxf_batches(file_path, batch_size=2000, cancel_event=None, cache=None):
+    """
+    Czyta plik DXF i zwraca kolejne paczki geometrii jako krotki (paczka, przetworzone, wszystkie).
+    Przerywa, gdy ustawiono cancel_event (threading.Event).
+    cache – opcjonalna DxfGeometryCache: przy trafieniu ezdxf nie jest w ogóle używany,
+    a po pełnym wczytaniu geometria trafia do pamięci podręcznej.
+    """
+    signature = None
+    if cache is not None:
+        from data.dxf_cache import file_signature
+
+        cached = cache.load(file_path)
+        if cached is not None:
+            yield from cached.iter_batches(batch_size, cancel_event)
+            return
+        signature = file_signature(file_path)
+
+    import ezdxf  # import leniwy – ezdxf potrzebny dopiero przy pierwszym pliku
+
+    doc = ezdxf.readfile(file_path)
+    msp = doc.modelspace()
+    total = len(msp)
+    converter = DxfConverter(doc)
+    converted = []
+
+    batch = GeometryBatch()
+    for processed, entity in enumerate(msp, start=1):
+        if cancel_event is not None and cancel_event.is_set():
+            return
+        converter.convert(entity, batch)
+        if len(batch) >= batch_size:
+            converted.append(batch)
+            yield batch, processed, total
+            batch = GeometryBatch()
+
+    converted.append(batch)
+    yield batch, total, total
+
+    for dxftype, count in converter.unsupported.items():
+        print(f"Nieobsługiwany typ: {dxftype} ({count} szt.)")
+
+    if cache is not None and not (cancel_event is not None and cancel_event.is_set()):
+        cache.store(file_path, signature, converted, total)
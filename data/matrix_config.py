@@ -0,0 +1,94 @@
+# data/matrix_config.py
+import json
+import os
+
+CONFIG_FILE = "config/matrix_config.json"
+
+
+def load_matrix_config():
+    """Wczytuje konfigurację matryc z pliku JSON."""
+    try:
+        with open(CONFIG_FILE, "r") as file:
+            return json.load(file)
+    except FileNotFoundError:
+        return {}
+    except json.JSONDecodeError as e:
+        print(f"Błąd wczytywania konfiguracji matryc: {e}")
+        return {}
+
+
+def save_matrix_config(config):
+    """
+    Zapisuje konfigurację matryc do pliku JSON – atomowo, przez plik tymczasowy.
+    Błąd zapisu (OSError, TypeError) przekazywany jest dalej, a dotychczasowy plik zostaje bez zmian.
+    """
+    tmp_file = f"{CONFIG_FILE}.tmp"
+    try:
+        with open(tmp_file, "w") as file:
+            json.dump(config, file, indent=4)
+        os.replace(tmp_file, CONFIG_FILE)
+    except Exception:
+        if os.path.exists(tmp_file):
+            os.remove(tmp_file)
+        raise
+    print(f"Zapisano konfigurację matryc w {CONFIG_FILE}")
+
+
+class MatrixConfigService:
+    """
+    Konfiguracja matryc trzymana w pamięci wraz z indeksem grubość -> frozenset szerokości V.
+    Plik czytany jest raz; reload_if_changed() wczytuje go ponownie tylko po zmianie mtime.
+    """
+    def __init__(self):
+        self._config = None
+        self._index = {}
+        self._mtime = None
+
+    def _file_mtime(self):
+        try:
+            return os.path.getmtime(CONFIG_FILE)
+        except OSError:
+            return None
+
+    def _set_config(self, config):
+        self._config = config
+        self._index = {float(grubosc): frozenset(float(w) for w in widths) for grubosc, widths in config.items()}
+
+    def _ensure_loaded(self):
+        if self._config is None:
+            self._mtime = self._file_mtime()
+            self._set_config(load_matrix_config())
+
+    def reload_if_changed(self):
+        """Wczytuje plik ponownie, jeśli zmienił się od ostatniego odczytu. Zwraca True po przeładowaniu."""
+        if self._config is not None and self._file_mtime() == self._mtime:
+            return False
+        self._config = None
+        self._ensure_loaded()
+        return True
+
+    def config(self):
+        self._ensure_loaded()
+        return self._config
+
+    def allowed_widths(self, grubosc):
+        """Dozwolone szerokości V dla grubości (frozenset) lub None, gdy grubości nie ma w konfiguracji."""
+        self._ensure_loaded()
+        return self._index.get(float(grubosc))
+
+    def pairs(self):
+        """Wszystkie skonfigurowane pary (grubość, V)."""
+        self._ensure_loaded()
+        return [(grubosc, width) for grubosc, widths in self._index.items() for width in sorted(widths)]
+
+    def save(self, config):
+        """
+        Zapisuje konfigurację do pliku i aktualizuje indeks w pamięci – tylko po udanym zapisie
+        (przy błędzie wyjątek z save_matrix_config, stan w pamięci bez zmian).
+        """
+        save_matrix_config(config)
+        self._set_config(config)
+        self._mtime = self._file_mtime()
+
+
+matrix_config_service = MatrixConfigService()
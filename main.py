@@ -1,34 +1,61 @@
 # main.py
-from PyQt5.QtWidgets import QApplication
-from data.data_loader import load_data
-from models.bd_model import BDModel
-from ui.main_window import MainWindow
-from ui.matrix_config_editor import MatrixConfigEditor
-from data.data_editor import DataEditorDialog
+import sys
+from utils.startup_timer import StartupTimer
 
-if __name__ == "__main__":
-    app = QApplication([])
+timer = StartupTimer()
 
-    # Inicjalizacja modelu
-    model = BDModel()
+# Tylko lekkie moduły – pandas, xgboost, joblib i ezdxf ładowane są leniwie
+with timer.phase("importy"):
+    from PyQt5.QtWidgets import QApplication, QMessageBox
+    from models.bd_model import BDModel
+    from ui.main_window import MainWindow
+    from ui.startup_loader import StartupLoader
+
+
+def on_data_loaded(data):
+    with timer.phase("edytory"):
+        from ui.matrix_config_editor import MatrixConfigEditor
+        from data.data_editor import DataEditorDialog
+
+        # Przygotowanie konfiguratora matryc
+        grubosci = sorted(data['Grubosc'].unique())
+        matryce = sorted(set(data['V'].unique()))
+        matrix_config_editor = MatrixConfigEditor(grubosci, matryce)
 
-    # Wczytanie danych
-    data = load_data()
+        # Inicjalizacja edytora danych
+        data_editor = DataEditorDialog(data)
 
-    # Próba wczytania lub przetrenowania modeli
-    model.train_models(data, force_retrain=False)
+    window.set_startup_data(data, matrix_config_editor, data_editor)
+    timer.mark("dane i modele gotowe")
+    timer.report()
 
-    # Przygotowanie konfiguratora matryc
-    grubosci = sorted(data['Grubosc'].unique())
-    matryce = sorted(set(data['V'].unique()))
-    matrix_config_editor = MatrixConfigEditor(grubosci, matryce)
 
-    # Inicjalizacja edytora danych
-    data_editor = DataEditorDialog(data)
+def on_load_failed(error):
+    timer.report()
+    QMessageBox.critical(window, "Błąd", f"Nie udało się wczytać danych lub modeli:\n{error}")
+
+
+if __name__ == "__main__":
+    app = QApplication(sys.argv)
+
+    # Inicjalizacja modelu (bez wczytywania – to dzieje się w tle)
+    model = BDModel()
 
-    # Utworzenie głównego okna aplikacji
-    window = MainWindow(data, model, matrix_config_editor, data_editor)
-    window.populate_comboboxes()
-    window.showMaximized()  # Uruchomienie na pełnym ekranie
+    # Utworzenie głównego okna aplikacji – przycisk obliczeń aktywny dopiero po wczytaniu modeli
+    with timer.phase("budowa UI"):
+        window = MainWindow(None, model, None, None)
+        if "--opengl" in sys.argv:
+            window.opengl_action.setChecked(True)  # rysowanie rysunku DXF przez OpenGL
+        window.showMaximized()  # Uruchomienie na pełnym ekranie
+    timer.mark("okno widoczne")
+
+    loader = StartupLoader(model, timer)
+    loader.loaded.connect(on_data_loaded)
+    loader.failed.connect(on_load_failed)
+    if "--sync-start" in sys.argv:
+        # Tryb zgodny z dawnym zachowaniem: wszystko w wątku GUI przed pętlą zdarzeń
+        loader.run()
+    else:
+        loader.start()
 
     app.exec_()
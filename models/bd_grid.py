@@ -0,0 +1,123 @@
+# models/bd_grid.py
+import numpy as np
+
+# Odstęp węzła tuż przed progiem podziału – model drzewiasty jest schodkowy względem kąta,
+# więc para węzłów (próg - eps, próg) odwzorowuje skok bez błędu interpolacji.
+SPLIT_EPS = 1e-4
+
+
+class BDLookupGrid:
+    """
+    Stablicowane wartości BD dla par (grubość, V) z konfiguracji matryc.
+    Dla każdego materiału i każdej pary trzymamy wiersz wartości BD na gęstej siatce kątów,
+    a zapytania obsługujemy wyszukaniem w tablicy i interpolacją liniową.
+    """
+    def __init__(self, angle_step=0.5, angle_min=0.0, angle_max=180.0, tolerance=0.05):
+        self.angle_step = angle_step
+        self.angle_min = angle_min
+        self.angle_max = angle_max
+        self.tolerance = tolerance
+
+        self.angles = None
+        self.tables = {}
+        self.pair_index = {}
+        self.max_error = None
+        self.valid = False
+
+    def build(self, predict_fn, pairs, materials=("CZ", "N"), breakpoints=()):
+        """
+        Buduje tablice BD.
+        predict_fn(thickness, V, angles, material) – wsadowa predykcja modelu (tablice NumPy).
+        pairs – lista par (grubość, V).
+        breakpoints – progi podziału kąta w modelu; dokładamy wokół nich węzły siatki.
+        """
+        pairs = sorted({(float(t), float(v)) for t, v in pairs})
+        self.pair_index = {pair: i for i, pair in enumerate(pairs)}
+        self.tables = {}
+        self.valid = False
+        if not pairs:
+            return
+
+        angles = np.arange(self.angle_min, self.angle_max + self.angle_step / 2, self.angle_step)
+        breakpoints = np.asarray([b for b in breakpoints if self.angle_min < b <= self.angle_max], dtype=float)
+        angles = np.unique(np.concatenate((angles, breakpoints, breakpoints - SPLIT_EPS)))
+        self.angles = angles
+
+        pair_arr = np.asarray(pairs, dtype=float)
+        thickness = np.repeat(pair_arr[:, 0], len(angles))
+        V = np.repeat(pair_arr[:, 1], len(angles))
+        all_angles = np.tile(angles, len(pairs))
+
+        for material in materials:
+            values = predict_fn(thickness, V, all_angles, material)
+            self.tables[material] = np.asarray(values, dtype=float).reshape(len(pairs), len(angles))
+
+        print(f"Zbudowano siatkę BD: {len(pairs)} par (grubość, V) x {len(angles)} kątów x {len(materials)} materiały.")
+
+    def validate(self, predict_fn, samples_per_pair=50, seed=0):
+        """Porównuje siatkę z modelem w losowych punktach i ustawia flagę valid wg tolerancji."""
+        if not self.tables:
+            self.valid = False
+            return None
+
+        rng = np.random.default_rng(seed)
+        pairs = np.asarray(list(self.pair_index), dtype=float)
+        thickness = np.repeat(pairs[:, 0], samples_per_pair)
+        V = np.repeat(pairs[:, 1], samples_per_pair)
+        angles = rng.uniform(self.angle_min, self.angle_max, len(thickness))
+
+        max_error = 0.0
+        for material in self.tables:
+            grid_values, found = self._interpolate(thickness, V, angles, material)
+            model_values = np.asarray(predict_fn(thickness, V, angles, material), dtype=float)
+            if found.any():
+                max_error = max(max_error, float(np.abs(grid_values[found] - model_values[found]).max()))
+
+        self.max_error = max_error
+        self.valid = max_error <= self.tolerance
+        if self.valid:
+            print(f"Siatka BD zgodna z modelem (maks. błąd {max_error:.4f} mm).")
+        else:
+            print(f"Siatka BD wyłączona: maks. błąd {max_error:.4f} mm > tolerancja {self.tolerance} mm.")
+        return max_error
+
+    def lookup(self, thickness, V, angles, material):
+        """
+        Zwraca (wartości, maska_trafień). Wiersze spoza siatki (nieznana para lub kąt poza zakresem)
+        mają maskę False i powinny zostać policzone modelem.
+        """
+        if not self.valid:
+            empty = np.zeros(np.size(angles), dtype=float)
+            return empty, empty.astype(bool)
+        return self._interpolate(thickness, V, angles, material)
+
+    def _interpolate(self, thickness, V, angles, material):
+        thickness = np.asarray(thickness, dtype=float)
+        V = np.asarray(V, dtype=float)
+        angles = np.asarray(angles, dtype=float)
+        values = np.zeros(len(angles), dtype=float)
+        found = np.zeros(len(angles), dtype=bool)
+
+        table = self.tables.get(material)
+        if table is None or len(angles) == 0:
+            return values, found
+
+        # Mapowanie (grubość, V) -> wiersz tablicy; par w konfiguracji matryc jest kilkanaście,
+        # więc porównanie wektorowe z każdą parą jest tańsze niż sortowanie zapytań
+        rows = np.full(len(angles), -1, dtype=int)
+        for (t, v), row in self.pair_index.items():
+            rows[(thickness == t) & (V == v)] = row
+
+        found = (rows >= 0) & (angles >= self.angle_min) & (angles <= self.angle_max)
+        if not found.any():
+            return values, found
+
+        rows = rows[found]
+        a = angles[found]
+        upper = np.clip(np.searchsorted(self.angles, a, side='right'), 1, len(self.angles) - 1)
+        lower = upper - 1
+        a0 = self.angles[lower]
+        a1 = self.angles[upper]
+        frac = np.clip((a - a0) / (a1 - a0), 0.0, 1.0)
+        values[found] = table[rows, lower] * (1.0 - frac) + table[rows, upper] * frac
+        return values, found
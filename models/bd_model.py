@@ -1,73 +1,732 @@
 # models/bd_model.py
+# Predykcja korzysta ze skompilowanych modeli (models.tree_ensemble, sam NumPy); joblib i xgboost
+# importowane są leniwie – tylko przy treningu, migracji dawnych modeli i kompilacji wersji bez modeli .npz
 import os
-import pandas as pd
-import joblib
-from xgboost import XGBRegressor
+import json
+import hashlib
+import shutil
+import numpy as np
 import time
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from models.bd_grid import BDLookupGrid
+from models.tree_ensemble import TreeEnsemble
+
+# Domyślne hiperparametry; konfiguracja wybrana strojeniem (python -m models.tuning) zapisywana jest
+# osobno dla każdego materiału w MODEL_PARAMS_FILE (zob. load_model_params)
+MODEL_PARAMS = {"n_estimators": 200, "max_depth": 5, "learning_rate": 0.1}
+MODEL_PARAMS_FILE = "config/model_params.json"
+FEATURES = ['Grubosc', 'V', 'Kat']
+TARGETS = {"CZ": 'BD_CZ', "N": 'BD_N'}
+# Liczba wierszy kontrolnych (i próbka danych treningowych) przy sprawdzaniu skompilowanych modeli
+VERIFY_ROWS = 2000
+
+# Aktualizacja przyrostowa (zob. BDModel.update_models): liczba dodatkowych rund boostingu,
+# maksymalny udział zmienionych wierszy, dopuszczalny wzrost błędu RMSE (względny i bezwzględny, mm)
+# oraz limit drzew w modelu (krotność n_estimators) – po jego przekroczeniu model trenowany jest od nowa.
+INCREMENTAL_PARAMS = {
+    "rounds": 20,
+    "max_changed_fraction": 0.2,
+    "rmse_tolerance": 0.1,
+    "rmse_margin": 0.01,
+    "max_rounds_factor": 2,
+}
+
+
+def load_model_params(file_path=MODEL_PARAMS_FILE):
+    """
+    Hiperparametry modeli dla każdego materiału: {materiał: {n_estimators, max_depth, learning_rate}}.
+    Wartości brakujące w pliku (lub brak pliku) uzupełniane są z MODEL_PARAMS.
+    """
+    try:
+        with open(file_path, "r", encoding="utf-8") as file:
+            config = json.load(file)
+    except FileNotFoundError:
+        config = {}
+    except json.JSONDecodeError as e:
+        print(f"Błąd wczytywania hiperparametrów modeli: {e}")
+        config = {}
+    return {
+        name: {param: type(default)(config.get(name, {}).get(param, default)) for param, default in MODEL_PARAMS.items()}
+        for name in TARGETS
+    }
+
+
+def save_model_params(params, report=None, file_path=MODEL_PARAMS_FILE):
+    """Zapisuje hiperparametry materiałów (format jak load_model_params) wraz z opcjonalnym raportem strojenia."""
+    config = {name: params[name] for name in TARGETS}
+    if report is not None:
+        config["tuning"] = report
+    os.makedirs(os.path.dirname(file_path) or ".", exist_ok=True)
+    with open(f"{file_path}.tmp", "w", encoding="utf-8") as file:
+        json.dump(config, file, indent=4)
+    os.replace(f"{file_path}.tmp", file_path)
+    print(f"Zapisano hiperparametry modeli w {file_path}")
+
+
+def training_data_hash(data):
+    """Skrót SHA-256 kolumn używanych do treningu (cechy i cele) w postaci float64."""
+    digest = hashlib.sha256()
+    digest.update(",".join(FEATURES + list(TARGETS.values())).encode("utf-8"))
+    digest.update(training_matrix(data).tobytes())
+    return digest.hexdigest()
+
+
+def training_matrix(data):
+    """Kolumny cech i celów (FEATURES + TARGETS) jako jedna tablica float64 – migawka danych treningowych."""
+    return np.ascontiguousarray(data[FEATURES + list(TARGETS.values())].to_numpy(dtype=np.float64))
+
+
+def _row_changes(old, new):
+    """Liczba wierszy dodanych i usuniętych między tablicami (porównanie multizbiorów wierszy, bez kolejności)."""
+    rows = np.concatenate((old, new))
+    if len(rows) == 0:
+        return 0, 0
+    _, inverse = np.unique(rows, axis=0, return_inverse=True)
+    inverse = inverse.ravel()
+    size = int(inverse.max()) + 1
+    difference = (np.bincount(inverse[len(old):], minlength=size)
+                  - np.bincount(inverse[:len(old)], minlength=size))
+    return int(difference[difference > 0].sum()), int(-difference[difference < 0].sum())
+
+
+def _rmse(booster, X, y):
+    if len(y) == 0:
+        return 0.0
+    return float(np.sqrt(np.mean((booster.inplace_predict(X) - y) ** 2)))
+
+
+def model_version_key(data, params=None):
+    """Klucz wersji modeli: skrót danych treningowych i hiperparametrów (domyślnie z load_model_params)."""
+    params = load_model_params() if params is None else params
+    digest = hashlib.sha256()
+    digest.update(training_data_hash(data).encode("utf-8"))
+    digest.update(json.dumps(params, sort_keys=True).encode("utf-8"))
+    return digest.hexdigest()[:24]
+
+
+def _directory_size(path):
+    return sum(entry.stat().st_size for entry in os.scandir(path) if entry.is_file())
+
+
+class TrainingCancelled(Exception):
+    """Trening modeli został przerwany na żądanie użytkownika."""
+
+
+def _training_progress_callback(on_iteration, cancel_event):
+    """Tworzy callback XGBoost raportujący postęp treningu i obsługujący przerwanie."""
+    from xgboost.callback import TrainingCallback
+
+    class TrainingProgress(TrainingCallback):
+        def after_iteration(self, model, epoch, evals_log):
+            on_iteration(epoch + 1)
+            # Zwrócenie True kończy trening po bieżącej iteracji
+            return cancel_event is not None and cancel_event.is_set()
+
+    return TrainingProgress()
+
+
+class BoosterModel:
+    """
+    Model XGBoost z interfejsem predykcji TreeEnsemble (predict, split_values) – używany, gdy
+    skompilowany model nie przeszedł sprawdzenia zgodności.
+    """
+    def __init__(self, booster):
+        self.booster = booster
+        self.max_difference = None
+
+    def predict(self, X):
+        return np.asarray(self.booster.inplace_predict(np.asarray(X, dtype=np.float32)), dtype=np.float64)
+
+    def split_values(self, feature):
+        if not isinstance(feature, str):
+            feature = FEATURES[feature]
+        trees = self.booster.trees_to_dataframe()
+        return np.unique(trees.loc[trees['Feature'] == feature, 'Split'].astype(float))
+
 
 class BDModel:
     def __init__(self):
         self.model_CZ = None
         self.model_N = None
-        self.model_path_CZ = "models/model_CZ_from_excel.joblib"
-        self.model_path_N = "models/model_N_from_excel.joblib"
+        # Magazyn wersji modeli: models/store/<klucz>/{model_CZ.ubj, model_N.ubj, meta.json} – modele XGBoost
+        # (trening, douczanie) – oraz model_CZ.npz, model_N.npz – modele skompilowane do predykcji (TreeEnsemble);
+        # klucz = skrót danych treningowych i hiperparametrów (zob. model_version_key)
+        self.store_dir = "models/store"
+        self.store_size_limit = 50 * 1024 * 1024
+        self.current_version = None
+        # Hiperparametry materiałów – odczytywane z pliku przy każdym treningu (zob. load_model_params)
+        self.params_path = MODEL_PARAMS_FILE
+        self.model_params = load_model_params(self.params_path)
+        # Dawne modele (pickle XGBRegressor) – migrowane jednorazowo do magazynu
+        self.legacy_model_path_CZ = "models/model_CZ_from_excel.joblib"
+        self.legacy_model_path_N = "models/model_N_from_excel.joblib"
 
-    def train_models(self, data, force_retrain=False):
-        """Trenuje modele dla materiałów CZ i N."""
-        print("Rozpoczęcie procesu zarządzania modelami.")
-        print(f"Ścieżki zapisów: {self.model_path_CZ}, {self.model_path_N}")
+        # Chroni podmianę modeli (wątek treningu) względem predykcji (wątek GUI)
+        self._lock = threading.RLock()
+
+        # Pamięć podręczna LRU wyników BD, kluczowana skwantowanymi wejściami
+        self.cache_size = 4096
+        self._cache = OrderedDict()
+        self.cache_hits = 0
+        self.cache_misses = 0
+
+        # Opcjonalna siatka BD (szybka inferencja), budowana po wczytaniu/treningu modeli
+        self.lookup_grid = None
+        self.grid_pairs = None
+        self.grid_settings = None
+
+    def clear_cache(self):
+        """Czyści pamięć podręczną wyników (np. po zmianie modeli)."""
+        with self._lock:
+            self._cache.clear()
+
+    def cache_info(self):
+        return {
+            "hits": self.cache_hits,
+            "misses": self.cache_misses,
+            "size": len(self._cache),
+            "maxsize": self.cache_size,
+        }
+
+    def enable_lookup_grid(self, pairs, angle_step=0.5, tolerance=0.05):
+        """Włącza siatkę BD dla podanych par (grubość, V), np. z konfiguracji matryc."""
+        self.grid_pairs = list(pairs)
+        self.grid_settings = {"angle_step": angle_step, "tolerance": tolerance}
+        if self.model_CZ is not None and self.model_N is not None:
+            self.rebuild_lookup_grid()
+
+    def disable_lookup_grid(self):
+        with self._lock:
+            self.lookup_grid = None
+            self.grid_pairs = None
+            self.grid_settings = None
+            self._cache.clear()
+
+    def rebuild_lookup_grid(self):
+        """Przelicza siatkę BD z aktualnych modeli i sprawdza jej zgodność z modelem."""
+        grid = self._build_lookup_grid((self.model_CZ, self.model_N))
+        with self._lock:
+            self.lookup_grid = grid
+            self._cache.clear()
 
-        X = data[['Grubosc', 'V', 'Kat']]
-        y_CZ = data['BD_CZ']
-        y_N = data['BD_N']
+    def _build_lookup_grid(self, models):
+        """Buduje nową siatkę BD dla podanej pary modeli (CZ, N) lub zwraca None, gdy siatka wyłączona."""
+        if self.grid_settings is None or not self.grid_pairs:
+            return None
+        grid = BDLookupGrid(**self.grid_settings)
 
-        if not force_retrain and os.path.exists(self.model_path_CZ) and os.path.exists(self.model_path_N):
+        def predict_fn(thickness, V, angles, material):
+            return self._predict_models(thickness, V, angles, material, models=models)
+
+        try:
+            grid.build(predict_fn, self.grid_pairs, breakpoints=self._angle_breakpoints(models))
+            grid.validate(predict_fn)
+        except Exception as e:
+            grid.valid = False
+            print(f"Błąd podczas budowania siatki BD: {e}")
+        return grid
+
+    @staticmethod
+    def _angle_breakpoints(models):
+        """Progi podziału po kącie ze wszystkich drzew obu modeli."""
+        breakpoints = set()
+        for model in models:
+            breakpoints.update(model.split_values(FEATURES.index('Kat')).tolist())
+        return sorted(breakpoints)
+
+    def swap_models(self, model_CZ, model_N):
+        """
+        Podmienia modele używane do predykcji (skompilowane, TreeEnsemble).
+        Siatka BD dla nowych modeli liczona jest przed podmianą, więc do tego momentu
+        predykcje korzystają ze starych modeli.
+        """
+        grid = self._build_lookup_grid((model_CZ, model_N))
+        with self._lock:
+            self.model_CZ = model_CZ
+            self.model_N = model_N
+            self.lookup_grid = grid
+            self._cache.clear()
+
+    def train_models(self, data, force_retrain=False, progress_callback=None, cancel_event=None, incremental=True):
+        """
+        Trenuje modele dla materiałów CZ i N.
+        Jeśli w magazynie istnieje wersja o kluczu zgodnym z danymi i hiperparametrami,
+        jest wczytywana zamiast treningu; force_retrain wymusza pełny trening mimo zgodności.
+        incremental – przy niewielkich zmianach względem danych bieżącej wersji modele są
+        douczane (zob. update_models) zamiast trenowane od nowa.
+        progress_callback(procent, komunikat) – opcjonalny raport postępu (wywoływany z wątków treningu).
+        cancel_event – opcjonalny threading.Event; jego ustawienie przerywa trening (TrainingCancelled),
+        a dotychczasowe modele pozostają bez zmian.
+        """
+        print("Rozpoczęcie procesu zarządzania modelami.")
+        required = FEATURES + list(TARGETS.values())
+        incomplete = data[required].isna().any(axis=1)
+        if incomplete.any():
+            # NaN w celach psułby trening – takie wiersze pomijamy
+            print(f"Pominięto {int(incomplete.sum())} wierszy z brakującymi wartościami {required}.")
+            data = data[~incomplete]
+        self.model_params = load_model_params(self.params_path)
+        key = model_version_key(data, self.model_params)
+        print(f"Wersja modeli dla bieżących danych: {key} (magazyn: {self.store_dir})")
+
+        if not force_retrain:
             try:
-                print("Wczytywanie zapisanych modeli...")
-                self.model_CZ = joblib.load(self.model_path_CZ)
-                self.model_N = joblib.load(self.model_path_N)
-                print(f"Data modyfikacji modelu CZ: {time.ctime(os.path.getmtime(self.model_path_CZ))}")
-                print(f"Data modyfikacji modelu N: {time.ctime(os.path.getmtime(self.model_path_N))}")
-                return
+                models = self.load_models(key)
+                if models is not None:
+                    self.swap_models(*models)
+                    self._set_active_version(key)
+                    if progress_callback is not None:
+                        progress_callback(100, "Modele dla tych danych były już wytrenowane.")
+                    return
             except Exception as e:
                 print(f"Błąd podczas wczytywania modeli: {e}. Rozpoczęcie ponownego treningu.")
 
-        print("Trening modeli...")
-        self.model_CZ = XGBRegressor(n_estimators=200, max_depth=5, learning_rate=0.1)
-        self.model_CZ.fit(X, y_CZ)
+        snapshot = training_matrix(data)
+        metadata = self._training_metadata(data)
+        update = self.update_models(snapshot, progress_callback, cancel_event) if incremental and not force_retrain else None
+        if update is not None:
+            model_CZ, model_N, methods, metadata["base_version"] = update
+        else:
+            model_CZ, model_N = self.fit_models(data, progress_callback, cancel_event)
+            methods = {name: "full" for name in TARGETS}
+        metadata["training"] = methods
+        compiled = self._compile_models(model_CZ, model_N, snapshot[:, :len(FEATURES)])
+        metadata["compiled_max_difference"] = {name: model.max_difference for name, model in zip(TARGETS, compiled)}
+        self.save_models(key, model_CZ, model_N, metadata, snapshot=snapshot, compiled=compiled)
+        self.swap_models(*compiled)
+        self._set_active_version(key)
+        self.evict_model_versions()
+
+        if progress_callback is not None:
+            progress_callback(100, "Modele przetrenowano.")
+
+    def _version_dir(self, key):
+        return os.path.join(self.store_dir, key)
 
-        self.model_N = XGBRegressor(n_estimators=200, max_depth=5, learning_rate=0.1)
-        self.model_N.fit(X, y_N)
+    def load_models(self, key):
+        """
+        Wczytuje skompilowane modele wersji (TreeEnsemble, bez importu xgboost); None, gdy wersji brak.
+        Wersja zapisana bez modeli .npz (sprzed kompilacji) jest kompilowana i uzupełniana przy pierwszym wczytaniu.
+        """
+        version_dir = self._version_dir(key)
+        paths = [os.path.join(version_dir, f"model_{name}.npz") for name in TARGETS]
+        if all(os.path.exists(path) for path in paths):
+            print(f"Wczytywanie zapisanych modeli wersji {key}...")
+            models = tuple(TreeEnsemble.load(path) for path in paths)
+        else:
+            boosters = self.load_boosters(key)
+            if boosters is None:
+                return None
+            print(f"Kompilacja modeli wersji {key}...")
+            models = self._compile_models(*boosters)
+            for model, path in zip(models, paths):
+                if isinstance(model, TreeEnsemble):
+                    model.save(f"{path}.tmp.npz")
+                    os.replace(f"{path}.tmp.npz", path)
+        metadata = self.read_metadata(key)
+        print(f"Modele wytrenowane {metadata.get('timestamp', 'brak danych')}")
+        # Czas modyfikacji katalogu służy jako znacznik ostatniego użycia przy usuwaniu starych wersji
+        os.utime(version_dir)
+        return models
+
+    def load_boosters(self, key):
+        """Wczytuje modele XGBoost wersji (xgboost.Booster – do douczania i kompilacji); None, gdy ich brak."""
+        if key is None:
+            return None
+        paths = [os.path.join(self._version_dir(key), f"model_{name}.ubj") for name in TARGETS]
+        if not all(os.path.exists(path) for path in paths):
+            return None
+        from xgboost import Booster
+
+        return tuple(Booster(model_file=path) for path in paths)
+
+    @staticmethod
+    def _compile_models(model_CZ, model_N, X=None, references=None):
+        """
+        Kompiluje modele XGBoost do TreeEnsemble i sprawdza zgodność predykcji (TreeEnsemble.verify)
+        na wierszach kontrolnych z progów podziału oraz na (próbce) wierszy X – względem references
+        (np. XGBRegressor), domyślnie samych boosterów. Przy niezgodności model zostaje przy XGBoost
+        (BoosterModel) – trening nie jest przerywany.
+        """
+        if X is not None and len(X) > VERIFY_ROWS:
+            X = X[np.random.default_rng(0).choice(len(X), VERIFY_ROWS, replace=False)]
+        references = (model_CZ, model_N) if references is None else references
+        compiled = []
+        for name, booster, reference in zip(TARGETS, (model_CZ, model_N), references):
+            model = TreeEnsemble.from_booster(booster)
+            rows = model.verification_rows(VERIFY_ROWS)
+            if X is not None and len(X):
+                rows = np.concatenate((rows, np.asarray(X, dtype=np.float32)))
+            try:
+                model.verify(reference, rows)
+            except ValueError as e:
+                print(f"Model {name}: {e} Predykcja pozostaje przy XGBoost.")
+                model = BoosterModel(booster)
+            compiled.append(model)
+        return tuple(compiled)
+
+    def load_active_models(self):
+        """
+        Wczytuje ostatnio używaną wersję modeli (plik CURRENT) bez potrzeby danych treningowych.
+        Gdy magazyn jest pusty, migruje dawne modele joblib. Zwraca True, jeśli modele wczytano.
+        """
+        key = self.stored_version()
+        models = self.load_models(key) if key is not None else None
+
+        if models is None:
+            key, models = "legacy", self._migrate_legacy_models()
+        if models is None:
+            return False
 
+        self.swap_models(*models)
+        self.current_version = key
+        return True
+
+    def stored_version(self):
+        """Klucz ostatnio używanej wersji z pliku CURRENT magazynu; None, gdy go brak."""
         try:
-            if os.path.exists(self.model_path_CZ):
-                os.remove(self.model_path_CZ)
-            if os.path.exists(self.model_path_N):
-                os.remove(self.model_path_N)
-        except Exception as e:
-            print(f"Błąd podczas usuwania starych modeli: {e}")
+            with open(os.path.join(self.store_dir, "CURRENT"), "r", encoding="utf-8") as file:
+                return file.read().strip() or None
+        except FileNotFoundError:
+            return None
+
+    def _set_active_version(self, key):
+        self.current_version = key
+        os.makedirs(self.store_dir, exist_ok=True)
+        pointer = os.path.join(self.store_dir, "CURRENT")
+        with open(f"{pointer}.tmp", "w", encoding="utf-8") as file:
+            file.write(key)
+        os.replace(f"{pointer}.tmp", pointer)
 
+    def read_metadata(self, key=None):
+        """Zwraca metadane wersji modeli (domyślnie bieżącej); pusty słownik, gdy brak."""
+        key = self.current_version if key is None else key
+        if key is None:
+            return {}
         try:
-            joblib.dump(self.model_CZ, self.model_path_CZ)
-            print(f"Model CZ zapisano do: {os.path.abspath(self.model_path_CZ)}")
-            print(f"Nowa data modyfikacji modelu CZ: {time.ctime(os.path.getmtime(self.model_path_CZ))}")
+            with open(os.path.join(self._version_dir(key), "meta.json"), "r", encoding="utf-8") as file:
+                return json.load(file)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return {}
+
+    def load_snapshot(self, key=None):
+        """Migawka danych treningowych wersji modeli (zob. training_matrix); None, gdy jej brak."""
+        key = self.current_version if key is None else key
+        if key is None:
+            return None
+        try:
+            return np.load(os.path.join(self._version_dir(key), "training_data.npy"))
+        except (FileNotFoundError, ValueError):
+            return None
+
+    def _training_metadata(self, data):
+        return {
+            "feature_names": FEATURES,
+            "data_hash": training_data_hash(data) if data is not None else None,
+            "params": self.model_params,
+            "timestamp": time.strftime("%Y-%m-%d %H:%M:%S"),
+        }
+
+    def _migrate_legacy_models(self):
+        """Konwertuje dawne modele joblib do magazynu (wersja 'legacy'); None, gdy ich nie ma."""
+        models = self.load_models("legacy")
+        if models is not None:
+            return models
+        if not os.path.exists(self.legacy_model_path_CZ) or not os.path.exists(self.legacy_model_path_N):
+            return None
+        import joblib
+
+        print("Migracja modeli joblib do natywnego formatu XGBoost...")
+        regressors = (joblib.load(self.legacy_model_path_CZ), joblib.load(self.legacy_model_path_N))
+        model_CZ, model_N = (regressor.get_booster() for regressor in regressors)
+        metadata = self._training_metadata(None)
+        metadata["migrated_from"] = [self.legacy_model_path_CZ, self.legacy_model_path_N]
+        # Zgodność skompilowanych modeli sprawdzana względem XGBRegressor.predict
+        compiled = self._compile_models(model_CZ, model_N, references=regressors)
+        self.save_models("legacy", model_CZ, model_N, metadata, compiled=compiled)
+        return compiled
+
+    def evict_model_versions(self):
+        """Usuwa najdawniej używane wersje modeli, aż magazyn zmieści się w limicie rozmiaru."""
+        if not os.path.isdir(self.store_dir):
+            return
+        versions = []
+        for entry in os.scandir(self.store_dir):
+            if entry.is_dir() and not entry.name.startswith(".tmp"):
+                versions.append((entry.stat().st_mtime, entry.name, _directory_size(entry.path)))
+
+        total = sum(size for _, _, size in versions)
+        for _, key, size in sorted(versions):
+            if total <= self.store_size_limit:
+                break
+            if key == self.current_version:
+                continue
+            shutil.rmtree(self._version_dir(key), ignore_errors=True)
+            total -= size
+            print(f"Usunięto starą wersję modeli: {key}")
+
+    def fit_models(self, data, progress_callback=None, cancel_event=None):
+        """Trenuje równolegle nowe modele CZ i N (xgboost.Booster) i zwraca je bez podmiany bieżących."""
+        print("Trening modeli...")
+        X = data[FEATURES].to_numpy(dtype=np.float64)
+        labels = {name: data[TARGETS[name]].to_numpy(dtype=np.float64) for name in TARGETS}
+        rounds = {name: self.model_params[name]["n_estimators"] for name in TARGETS}
+        models = self._train_boosters(X, labels, rounds, {}, progress_callback, cancel_event)
+        return models["CZ"], models["N"]
+
+    def _train_boosters(self, X, labels, rounds, base_models, progress_callback=None, cancel_event=None):
+        """
+        Trenuje równolegle boostery dla materiałów z labels (nazwa -> wartości celu), każdy przez
+        rounds[nazwa] rund, z głębokością drzew i krokiem uczenia z self.model_params. Booster z base_models
+        jest kontynuowany (dokładane są nowe drzewa), a sam pozostaje niezmieniony.
+        Zwraca słownik nazwa -> xgboost.Booster.
+        """
+        import xgboost as xgb
+
+        total = sum(rounds[name] for name in labels)
+        done = {name: 0 for name in labels}
+
+        def report(name, iteration):
+            done[name] = iteration
+            if progress_callback is not None:
+                percent = int(99 * sum(done.values()) / total)
+                progress_callback(percent, f"Trening modelu {name}: {iteration}/{rounds[name]}")
+
+        # Modele trenowane jednocześnie – rdzenie dzielone po równo
+        n_jobs = max(1, (os.cpu_count() or 2) // len(labels))
+
+        def fit(name):
+            params = {
+                "objective": "reg:squarederror",
+                "max_depth": self.model_params[name]["max_depth"],
+                "eta": self.model_params[name]["learning_rate"],
+                "nthread": n_jobs,
+            }
+            dtrain = xgb.DMatrix(X, label=labels[name], feature_names=FEATURES)
+            return xgb.train(
+                params,
+                dtrain,
+                num_boost_round=rounds[name],
+                xgb_model=base_models.get(name),
+                callbacks=[_training_progress_callback(lambda it: report(name, it), cancel_event)],
+            )
+
+        with ThreadPoolExecutor(max_workers=len(labels)) as executor:
+            futures = {name: executor.submit(fit, name) for name in labels}
+            models = {name: future.result() for name, future in futures.items()}
 
-            joblib.dump(self.model_N, self.model_path_N)
-            print(f"Model N zapisano do: {os.path.abspath(self.model_path_N)}")
-            print(f"Nowa data modyfikacji modelu N: {time.ctime(os.path.getmtime(self.model_path_N))}")
+        if cancel_event is not None and cancel_event.is_set():
+            print("Trening modeli przerwany.")
+            raise TrainingCancelled()
+
+        return models
+
+    def update_models(self, snapshot, progress_callback=None, cancel_event=None):
+        """
+        Douczanie bieżących modeli po zmianie danych treningowych (snapshot – zob. training_matrix).
+        Zmiany wykrywane są względem migawki danych wersji bazowej – bieżącej, a po ponownym uruchomieniu
+        (dane mogły zmienić się poza edytorem) wskazanej w pliku CURRENT – osobno dla każdego materiału:
+        model bez zmian w swoich kolumnach zostaje bez zmian, przy niewielkiej zmianie dostaje
+        INCREMENTAL_PARAMS["rounds"] nowych drzew uczonych na pełnych nowych danych, a przy dużej
+        zmianie, przekroczonym limicie drzew lub wzroście błędu RMSE ponad tolerancję jest trenowany
+        od nowa. Zwraca (model_CZ, model_N, {materiał: "unchanged"|"incremental"|"full"}, klucz wersji
+        bazowej) albo None, gdy douczanie nie jest możliwe (brak migawki lub modeli, zmienione hiperparametry).
+        """
+        base_version = self.current_version or self.stored_version()
+        boosters = self.load_boosters(base_version)
+        previous = self.load_snapshot(base_version)
+        if previous is None or boosters is None:
+            return None
+        base_models = dict(zip(TARGETS, boosters))
+        if (self.read_metadata(base_version).get("params") != self.model_params
+                or previous.shape[1] != snapshot.shape[1]):
+            return None
+
+        n_features = len(FEATURES)
+        X = snapshot[:, :n_features]
+        old_X = previous[:, :n_features]
+        settings = INCREMENTAL_PARAMS
+        columns = {name: column for column, name in enumerate(TARGETS, start=n_features)}
+        methods = {}
+        for name, column in columns.items():
+            # Zmiana dla materiału to wiersze różniące się cechami lub jego kolumną celu
+            selected = list(range(n_features)) + [column]
+            added, removed = _row_changes(previous[:, selected], snapshot[:, selected])
+            fraction = (added + removed) / max(len(previous), 1)
+            tree_count = base_models[name].num_boosted_rounds() + settings["rounds"]
+            if added + removed == 0:
+                methods[name] = "unchanged"
+            elif (fraction > settings["max_changed_fraction"]
+                  or tree_count > settings["max_rounds_factor"] * self.model_params[name]["n_estimators"]):
+                methods[name] = "full"
+            else:
+                methods[name] = "incremental"
+            print(f"Model {name}: +{added}/-{removed} wierszy ({fraction:.1%}) – {methods[name]}")
+
+        if all(method == "full" for method in methods.values()):
+            return None
+
+        start = time.perf_counter()
+        labels = {name: snapshot[:, columns[name]] for name in TARGETS if methods[name] == "incremental"}
+        models = dict(base_models)
+        if labels:
+            rounds = {name: settings["rounds"] for name in labels}
+            models.update(self._train_boosters(X, labels, rounds, base_models, progress_callback, cancel_event))
+
+        # Walidacja: błąd douczonego modelu na nowych danych nie może istotnie przekroczyć
+        # błędu poprzedniego modelu na jego danych treningowych
+        for name in labels:
+            previous_rmse = _rmse(base_models[name], old_X, previous[:, columns[name]])
+            rmse = _rmse(models[name], X, labels[name])
+            if rmse > previous_rmse * (1 + settings["rmse_tolerance"]) + settings["rmse_margin"]:
+                print(f"Model {name}: RMSE po douczeniu {rmse:.4f} > {previous_rmse:.4f} – pełny trening.")
+                methods[name] = "full"
+
+        full = {name: snapshot[:, columns[name]] for name in TARGETS if methods[name] == "full"}
+        if full:
+            rounds = {name: self.model_params[name]["n_estimators"] for name in full}
+            models.update(self._train_boosters(X, full, rounds, {}, progress_callback, cancel_event))
+
+        print(f"Aktualizacja modeli zakończona w {time.perf_counter() - start:.2f} s: {methods}")
+        return models["CZ"], models["N"], methods, base_version
+
+    def save_models(self, key, model_CZ, model_N, metadata, snapshot=None, compiled=None):
+        """
+        Zapisuje wersję modeli atomowo: pliki UBJSON, skompilowane modele .npz i meta.json trafiają
+        do katalogu tymczasowego, który jest następnie przemianowywany na katalog wersji.
+        Wersje już zapisane pozostają nienaruszone, dopóki nowa nie zostanie zapisana w całości.
+        snapshot – opcjonalna migawka danych treningowych (training_data.npy) do douczania modeli.
+        compiled – para TreeEnsemble (CZ, N); domyślnie kompilowana z model_CZ i model_N. Modele, których
+        nie udało się skompilować zgodnie (BoosterModel), nie dostają pliku .npz.
+        """
+        version_dir = self._version_dir(key)
+        tmp_dir = os.path.join(self.store_dir, f".tmp-{key}-{os.getpid()}-{threading.get_ident()}")
+        try:
+            os.makedirs(tmp_dir, exist_ok=True)
+            if compiled is None:
+                compiled = self._compile_models(model_CZ, model_N)
+            for name, booster, model in zip(TARGETS, (model_CZ, model_N), compiled):
+                booster.save_model(os.path.join(tmp_dir, f"model_{name}.ubj"))
+                if isinstance(model, TreeEnsemble):
+                    model.save(os.path.join(tmp_dir, f"model_{name}.npz"))
+            with open(os.path.join(tmp_dir, "meta.json"), "w", encoding="utf-8") as file:
+                json.dump(metadata, file, indent=4)
+            if snapshot is not None:
+                np.save(os.path.join(tmp_dir, "training_data.npy"), snapshot)
+
+            if os.path.isdir(version_dir):
+                shutil.rmtree(version_dir)
+            os.replace(tmp_dir, version_dir)
+            print(f"Modele zapisano do: {os.path.abspath(version_dir)}")
         except Exception as e:
+            shutil.rmtree(tmp_dir, ignore_errors=True)
             print(f"Błąd podczas zapisywania modeli: {e}")
 
-        if not os.path.exists(self.model_path_CZ) or not os.path.exists(self.model_path_N):
+        if not os.path.isdir(version_dir):
             print("Błąd: Modele nie zostały zapisane!")
         else:
             print("Modele zostały poprawnie zapisane.")
 
     def oblicz_bd(self, t, V, kat, material):
         """Oblicza BD na podstawie modelu."""
-        model = self.model_CZ if material == "CZ" else self.model_N
-        X_new = pd.DataFrame([[t, V, kat]], columns=['Grubosc', 'V', 'Kat'])
-        print(f"Obliczenia dla: {X_new}")
-        bd_value = model.predict(X_new)[0]
-        print(f"Wynik BD: {bd_value}")
-        return max(bd_value, 0.0)
+        bd_value = self.predict_many(t, V, kat, material)[0]
+        print(f"Wynik BD dla (t={t}, V={V}, kąt={kat}, {material}): {bd_value}")
+        return bd_value
+
+    def predict_many(self, thickness, V, angles, material):
+        """
+        Oblicza BD dla wielu gięć naraz.
+        Argumenty mogą być skalarami lub tablicami NumPy (są rozgłaszane do wspólnego rozmiaru).
+        Wiersze grupowane są po materiale – jedno wywołanie predict na model.
+        Wyniki trafiają do pamięci podręcznej LRU (zob. cache_info), czyszczonej po zmianie modeli.
+        Zwraca tablicę float z wartościami BD obciętymi od dołu do 0.
+        """
+        thickness, V, angles, material = np.broadcast_arrays(
+            np.asarray(thickness, dtype=float),
+            np.asarray(V, dtype=float),
+            np.asarray(angles, dtype=float),
+            np.asarray(material),
+        )
+        thickness = thickness.ravel()
+        V = V.ravel()
+        angles = angles.ravel()
+        material = material.ravel()
+
+        if len(angles) == 0:
+            return np.zeros(0, dtype=float)
+
+        with self._lock:
+            return self._predict_cached(thickness, V, angles, material)
+
+    def _predict_cached(self, thickness, V, angles, material):
+        # Duże wsady (np. cała biblioteka detali) i tak wypchnęłyby cały cache – liczymy je bezpośrednio
+        if len(angles) > self.cache_size:
+            return self._predict_uncached(thickness, V, angles, material)
+
+        # Klucz z kwantyzowanych wejść – te same gięcia (np. 90° na tej samej matrycy) trafiają w cache;
+        # predykcja na wartościach oryginalnych, jak dla wsadów liczonych bez cache
+        keys = list(zip(np.round(thickness, 3).tolist(), np.round(V, 3).tolist(), np.round(angles, 2).tolist(),
+                        material.tolist()))
+
+        result = np.empty(len(keys), dtype=float)
+        missing = []
+        for i, key in enumerate(keys):
+            value = self._cache.get(key)
+            if value is None:
+                missing.append(i)
+            else:
+                self._cache.move_to_end(key)
+                result[i] = value
+
+        self.cache_hits += len(keys) - len(missing)
+        self.cache_misses += len(missing)
+        if not missing:
+            return result
+
+        missing = np.asarray(missing)
+        values = self._predict_uncached(thickness[missing], V[missing], angles[missing], material[missing])
+        result[missing] = values
+        for i, value in zip(missing.tolist(), values.tolist()):
+            self._cache[keys[i]] = value
+        while len(self._cache) > self.cache_size:
+            self._cache.popitem(last=False)
+
+        return result
+
+    def _predict_uncached(self, thickness, V, angles, material):
+        """Predykcja z siatki BD (jeśli aktywna) z uzupełnieniem modelem; wynik obcięty do >= 0."""
+        if self.lookup_grid is not None and self.lookup_grid.valid:
+            result = np.zeros(len(angles), dtype=float)
+            is_cz = material == "CZ"
+            for mask, name in ((is_cz, "CZ"), (~is_cz, "N")):
+                if not mask.any():
+                    continue
+                values, found = self.lookup_grid.lookup(thickness[mask], V[mask], angles[mask], name)
+                if not found.all():
+                    missing = ~found
+                    values[missing] = self._predict_models(
+                        thickness[mask][missing], V[mask][missing], angles[mask][missing], name
+                    )
+                result[mask] = values
+        else:
+            result = self._predict_models(thickness, V, angles, material)
+
+        return np.maximum(result, 0.0)
+
+    def _predict_models(self, thickness, V, angles, material, models=None):
+        """
+        Surowa predykcja skompilowanych modeli (bez siatki), jedno wywołanie predict na materiał.
+        models – opcjonalna para (CZ, N); domyślnie bieżące modele.
+        """
+        model_CZ, model_N = models if models is not None else (self.model_CZ, self.model_N)
+        material = np.broadcast_to(np.asarray(material), np.shape(angles))
+        result = np.zeros(len(angles), dtype=float)
+        X = np.column_stack((thickness, V, angles))
+        is_cz = material == "CZ"
+        for mask, model in ((is_cz, model_CZ), (~is_cz, model_N)):
+            if not mask.any():
+                continue
+            result[mask] = model.predict(X[mask])
+        return result
@@ -1,6 +1,7 @@
 # models/calculator.py
 from PyQt5.QtWidgets import QTableWidgetItem
 from PyQt5.QtCore import Qt
+import numpy as np
 
 class BDUbytkiCalculator:
     def __init__(self, model):
@@ -8,10 +9,11 @@ class BDUbytkiCalculator:
 
     def calculate(self, grubosc, V, material, table):
         """Oblicza łączną długość, całkowity ubytek materiału i efektywną długość."""
-        total_length = 0.0
-        total_bd = 0.0
-        total_effective_length = 0.0
+        grubosc = float(grubosc)
+        V = float(V.strip("[]"))
 
+        dlugosci = []
+        katy = []
         for row in range(table.rowCount()):
             dlugosc_item = table.item(row, 0)
             kat_item = table.item(row, 1)
@@ -19,23 +21,26 @@ class BDUbytkiCalculator:
             if not dlugosc_item or not kat_item:
                 raise ValueError(f"Puste pola w wierszu {row + 1}.")
 
-            dlugosc = float(dlugosc_item.text())
-            kat = float(kat_item.text())
-            grubosc = float(grubosc)
-            V = float(V.strip("[]"))
+            dlugosci.append(float(dlugosc_item.text()))
+            katy.append(float(kat_item.text()))
 
-            if kat == 0:
-                bd_value = 0.0
-            else:
-                bd_value = self.model.oblicz_bd(grubosc, V, kat, material)
+        dlugosci = np.asarray(dlugosci, dtype=float)
+        katy = np.asarray(katy, dtype=float)
 
-            total_length += dlugosc
-            total_bd += bd_value
-            total_effective_length += max(dlugosc - bd_value, 0)
+        # Kąt 0 oznacza brak gięcia – model wywołujemy tylko dla pozostałych wierszy
+        bd_values = np.zeros(len(katy), dtype=float)
+        giete = katy != 0
+        if giete.any():
+            bd_values[giete] = self.model.predict_many(grubosc, V, katy[giete], material)
 
+        for row, bd_value in enumerate(bd_values):
             bd_item = table.item(row, 2) or QTableWidgetItem()
             bd_item.setText(f"{bd_value:.2f}")
             bd_item.setFlags(Qt.ItemIsEnabled)
             table.setItem(row, 2, bd_item)
 
+        total_length = float(dlugosci.sum())
+        total_bd = float(bd_values.sum())
+        total_effective_length = float(np.maximum(dlugosci - bd_values, 0).sum())
+
         return total_length, total_bd, total_effective_length
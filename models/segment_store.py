@@ -0,0 +1,123 @@
+# models/segment_store.py
+import numpy as np
+
+
+class SegmentStore:
+    """
+    Segmenty detalu trzymane jako tablice NumPy posortowane po pozycji gięcia (x od krawędzi detalu).
+    Długość segmentu to różnica pozycji sąsiednich gięć, więc nie jest przechowywana – wstawienie
+    lub usunięcie gięcia zmienia długość najwyżej jednego sąsiedniego segmentu, a łączna długość
+    to pozycja ostatniego gięcia. Miejsce wstawienia wyznacza wyszukiwanie binarne (O(log n)), ale samo
+    wstawienie i usunięcie przesuwa końcówki tablic (O(n), jedno kopiowanie bloku pamięci na tablicę) –
+    przy liczbie gięć jednego detalu to pomijalny koszt.
+    Tablice mają zapas pojemności podwajany po zapełnieniu (jak _ColumnBuffer w data_list).
+    """
+    def __init__(self, capacity=64):
+        self.size = 0
+        self._x = np.empty(capacity, dtype=np.float64)
+        self._angle = np.empty(capacity, dtype=np.float64)
+        self._bd = np.empty(capacity, dtype=np.float64)        # NaN – BD jeszcze nie policzone
+        self._line_ids = []  # wszystkie linie gięcia segmentu (współliniowe odcinki jednego gięcia)
+
+    def __len__(self):
+        return self.size
+
+    @property
+    def x(self):
+        return self._x[:self.size]
+
+    @property
+    def angle(self):
+        return self._angle[:self.size]
+
+    @property
+    def bd(self):
+        return self._bd[:self.size]
+
+    def line_ids(self, row):
+        return self._line_ids[row]
+
+    def clear(self):
+        self.size = 0
+        self._line_ids = []
+
+    def _reserve(self, size):
+        if size <= len(self._x):
+            return
+        capacity = max(size, 2 * len(self._x))
+        for name in ("_x", "_angle", "_bd"):
+            array = getattr(self, name)
+            grown = np.empty(capacity, dtype=array.dtype)
+            grown[:self.size] = array[:self.size]
+            setattr(self, name, grown)
+
+    def insertion_row(self, x):
+        """Wiersz, w którym znajdzie się gięcie w pozycji x (za gięciami w tej samej pozycji)."""
+        return int(np.searchsorted(self.x, x, side='right'))
+
+    def insert(self, x, angle=90.0, line_ids=()):
+        """Wstawia segment kończący się gięciem w pozycji x i zwraca jego wiersz."""
+        row = self.insertion_row(x)
+        self._reserve(self.size + 1)
+        n = self.size
+        for array in (self._x, self._angle, self._bd):
+            array[row + 1:n + 1] = array[row:n]
+        line_ids = list(line_ids)
+        self._x[row] = x
+        self._angle[row] = angle
+        self._bd[row] = np.nan
+        self._line_ids.insert(row, line_ids)
+        self.size += 1
+        return row
+
+    def extend(self, xs, angles, line_ids):
+        """Wstawia wiele segmentów naraz (jedno sortowanie zamiast wstawiania po kolei)."""
+        xs = np.asarray(xs, dtype=np.float64)
+        angles = np.asarray(angles, dtype=np.float64)
+        n = self.size
+        self._reserve(n + len(xs))
+        self._x[n:n + len(xs)] = xs
+        self._angle[n:n + len(xs)] = angles
+        self._bd[n:n + len(xs)] = np.nan
+        self._line_ids.extend(list(ids) for ids in line_ids)
+        self.size += len(xs)
+
+        order = np.argsort(self.x, kind='stable')
+        for name in ("_x", "_angle", "_bd"):
+            array = getattr(self, name)
+            array[:self.size] = array[:self.size][order]
+        self._line_ids = [self._line_ids[i] for i in order.tolist()]
+
+    def remove(self, row):
+        """Usuwa segment i zwraca identyfikatory jego linii gięcia."""
+        n = self.size
+        for array in (self._x, self._angle, self._bd):
+            array[row:n - 1] = array[row + 1:n]
+        self.size -= 1
+        return self._line_ids.pop(row)
+
+    def length(self, row):
+        return self._x[row] - (self._x[row - 1] if row > 0 else 0.0)
+
+    def lengths(self):
+        return np.diff(self.x, prepend=0.0)
+
+    def set_length(self, row, length):
+        """
+        Zmienia długość segmentu, przesuwając jego gięcie i wszystkie dalsze o tę samą wartość –
+        długości pozostałych segmentów się nie zmieniają. Ujemna długość jest odrzucana (False).
+        """
+        if length < 0:
+            return False
+        self._x[row:self.size] += length - self.length(row)
+        return True
+
+    def set_angle(self, row, angle):
+        self._angle[row] = angle
+        self._bd[row] = np.nan
+
+    def set_bd(self, values):
+        self._bd[:self.size] = values
+
+    def total_length(self):
+        return float(self._x[self.size - 1]) if self.size else 0.0
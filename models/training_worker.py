@@ -0,0 +1,40 @@
+# models/training_worker.py
+import threading
+from PyQt5.QtCore import QThread, pyqtSignal
+from models.bd_model import TrainingCancelled
+
+
+class ModelTrainingWorker(QThread):
+    """
+    Trenuje modele BD w osobnym wątku, aby nie blokować GUI.
+    Do czasu podmiany BDModel obsługuje predykcje starymi modelami.
+    """
+    progress = pyqtSignal(int, str)
+    trained = pyqtSignal()
+    cancelled = pyqtSignal()
+    failed = pyqtSignal(str)
+
+    def __init__(self, model, data, parent=None):
+        super().__init__(parent)
+        self.model = model
+        self.data = data
+        self._cancel_event = threading.Event()
+
+    def cancel(self):
+        """Prosi o przerwanie treningu – zostanie zakończony po bieżącej iteracji boostingu."""
+        self._cancel_event.set()
+
+    def run(self):
+        try:
+            # Bez force_retrain – o treningu decyduje skrót danych (niezmienione dane = wczytanie wersji),
+            # a niewielkie zmiany danych douczają bieżące modele zamiast pełnego treningu
+            self.model.train_models(
+                self.data,
+                progress_callback=self.progress.emit,
+                cancel_event=self._cancel_event,
+            )
+            self.trained.emit()
+        except TrainingCancelled:
+            self.cancelled.emit()
+        except Exception as e:
+            self.failed.emit(str(e))
@@ -0,0 +1,179 @@
+# models/tree_ensemble.py
+# Moduł nie importuje xgboost – modele XGBoost są tu tylko kompilowane (przez ich własne metody)
+import json
+import numpy as np
+
+# Wiersze przetwarzane naraz w predict (tablica węzłów ma rozmiar wiersze x drzewa)
+PREDICT_CHUNK = 8192
+
+
+def _base_score(booster):
+    """base_score z konfiguracji modelu (w XGBoost 3 zapisywany jako wektor, np. "[2.95E0]")."""
+    learner = json.loads(booster.save_config())["learner"]
+    objective = learner["objective"]["name"]
+    if objective != "reg:squarederror":
+        raise ValueError(f"Nieobsługiwana funkcja celu modelu: {objective}")
+    return float(learner["learner_model_param"]["base_score"].strip("[]").split(",")[0])
+
+
+class TreeEnsemble:
+    """
+    Skompilowany model XGBoost (regresja) jako płaskie tablice NumPy – wszystkie węzły wszystkich
+    drzew w jednej numeracji: cecha i próg podziału, dzieci lewe/prawe, kierunek dla braku wartości
+    oraz wartość liścia. Liście wskazują same na siebie, więc predykcja to max_depth kroków
+    wykonywanych naraz dla wszystkich wierszy i drzew – bez xgboost w czasie działania.
+    Porównania jak w XGBoost: float32, x < próg -> lewe dziecko.
+    """
+    def __init__(self, feature, threshold, left, right, default_left, value, roots, base_score, max_depth,
+                 feature_names=()):
+        self.feature = np.asarray(feature, dtype=np.int32)
+        self.threshold = np.asarray(threshold, dtype=np.float32)
+        self.left = np.asarray(left, dtype=np.int32)
+        self.right = np.asarray(right, dtype=np.int32)
+        self.default_left = np.asarray(default_left, dtype=bool)
+        self.value = np.asarray(value, dtype=np.float32)
+        self.roots = np.asarray(roots, dtype=np.int32)
+        self.base_score = float(base_score)
+        self.max_depth = int(max_depth)
+        self.feature_names = list(feature_names)
+        self.max_difference = None  # wynik ostatniego verify
+        # Dzieci węzła i: children[2i] (lewe) i children[2i + 1] (prawe)
+        self.children = np.column_stack((self.left, self.right)).ravel()
+
+    @property
+    def num_trees(self):
+        return len(self.roots)
+
+    @classmethod
+    def from_booster(cls, booster):
+        """Kompiluje xgboost.Booster (lub booster XGBRegressor.get_booster()) do tablic NumPy."""
+        model = json.loads(booster.save_raw("json"))["learner"]
+        trees = model["gradient_booster"]["model"]["trees"]
+        arrays = {name: [] for name in ("feature", "threshold", "left", "right", "default_left", "value")}
+        roots = []
+        max_depth = 0
+        offset = 0
+        for tree in trees:
+            left = np.asarray(tree["left_children"], dtype=np.int64)
+            right = np.asarray(tree["right_children"], dtype=np.int64)
+            if any(tree.get("split_type", [])):
+                raise ValueError("Podziały kategoryczne nie są obsługiwane.")
+            is_leaf = left < 0
+            nodes = np.arange(len(left))
+            # Liść wskazuje sam na siebie; numeracja węzłów przesunięta o początek drzewa
+            arrays["left"].append(np.where(is_leaf, nodes, left) + offset)
+            arrays["right"].append(np.where(is_leaf, nodes, right) + offset)
+            arrays["feature"].append(np.where(is_leaf, 0, tree["split_indices"]))
+            conditions = np.asarray(tree["split_conditions"], dtype=np.float32)
+            arrays["threshold"].append(np.where(is_leaf, np.float32(0), conditions))
+            arrays["value"].append(np.where(is_leaf, conditions, np.float32(0)))
+            arrays["default_left"].append(np.asarray(tree["default_left"], dtype=bool))
+            roots.append(offset)
+            offset += len(left)
+
+            depth = np.zeros(len(left), dtype=np.int64)
+            for node in nodes[~is_leaf]:  # rodzic ma zawsze mniejszy numer niż dzieci
+                depth[left[node]] = depth[right[node]] = depth[node] + 1
+            max_depth = max(max_depth, int(depth.max()))
+
+        def joined(name, dtype):
+            return np.concatenate(arrays[name]).astype(dtype) if trees else np.zeros(0, dtype=dtype)
+
+        return cls(
+            joined("feature", np.int32), joined("threshold", np.float32),
+            joined("left", np.int32), joined("right", np.int32),
+            joined("default_left", bool), joined("value", np.float32),
+            roots, _base_score(booster), max_depth, booster.feature_names or (),
+        )
+
+    def first_trees(self, n_trees):
+        """Model złożony z pierwszych n_trees drzew (tablice węzłów współdzielone, bez kopiowania)."""
+        model = TreeEnsemble(self.feature, self.threshold, self.left, self.right, self.default_left, self.value,
+                             self.roots[:n_trees], self.base_score, self.max_depth, self.feature_names)
+        return model
+
+    def predict(self, X):
+        """Predykcja dla wierszy X (n x liczba cech), wektorowo dla wszystkich drzew naraz."""
+        X = np.atleast_2d(np.asarray(X, dtype=np.float32))
+        result = np.full(len(X), self.base_score, dtype=np.float64)
+        if not self.num_trees:
+            return result
+        for start in range(0, len(X), PREDICT_CHUNK):
+            chunk = X[start:start + PREDICT_CHUNK]
+            n_rows = len(chunk)
+            # Wartość cechy węzła w kolumnowo spłaszczonym wsadzie: columns[feature * n_rows + wiersz]
+            columns = np.ascontiguousarray(chunk.T).ravel()
+            has_missing = np.isnan(columns).any()
+            rows = np.arange(n_rows, dtype=np.int32)[:, None]
+            nodes = np.broadcast_to(self.roots, (n_rows, self.num_trees))
+            for _ in range(self.max_depth):
+                values = columns[self.feature[nodes] * n_rows + rows]
+                go_right = values >= self.threshold[nodes]
+                if has_missing:
+                    missing = np.isnan(values)
+                    go_right[missing] = ~self.default_left[nodes[missing]]
+                nodes = self.children[2 * nodes + go_right]
+            result[start:start + n_rows] += self.value[nodes].sum(axis=1, dtype=np.float64)
+        return result
+
+    def split_values(self, feature):
+        """Posortowane progi podziału dla cechy (indeks lub nazwa) ze wszystkich drzew."""
+        if isinstance(feature, str):
+            feature = self.feature_names.index(feature)
+        internal = self.left != np.arange(len(self.left))
+        return np.unique(self.threshold[internal & (self.feature == feature)].astype(np.float64))
+
+    def verification_rows(self, n_rows=2000, seed=0):
+        """
+        Wiersze do sprawdzenia zgodności z XGBoost: losowe wartości z zakresu progów każdej cechy
+        oraz same progi (przypadki graniczne porównania x < próg).
+        """
+        rng = np.random.default_rng(seed)
+        n_features = int(self.feature.max()) + 1 if len(self.feature) else 1
+        n_features = max(n_features, len(self.feature_names))
+        X = np.zeros((n_rows, n_features), dtype=np.float32)
+        for feature in range(n_features):
+            splits = self.split_values(feature).astype(np.float32)
+            if len(splits) == 0:
+                continue
+            low, high = float(splits[0]) - 1.0, float(splits[-1]) + 1.0
+            column = rng.uniform(low, high, n_rows).astype(np.float32)
+            exact = rng.random(n_rows) < 0.3
+            column[exact] = rng.choice(splits, int(exact.sum()))
+            X[:, feature] = column
+        return X
+
+    def verify(self, model, X=None, tolerance=1e-4):
+        """
+        Sprawdza zgodność predykcji z modelem XGBoost – xgboost.Booster (inplace_predict) lub
+        XGBRegressor (predict) – na wierszach X (domyślnie verification_rows). Zwraca maksymalną
+        różnicę (zapamiętaną w max_difference); przy przekroczeniu tolerancji (względnej, co najmniej
+        bezwzględnej) zgłasza ValueError.
+        """
+        X = self.verification_rows() if X is None else np.asarray(X, dtype=np.float32)
+        expected = model.predict(X) if hasattr(model, "get_booster") else model.inplace_predict(X)
+        expected = np.asarray(expected, dtype=np.float64)
+        difference = np.abs(self.predict(X) - expected)
+        limit = tolerance * np.maximum(1.0, np.abs(expected))
+        if np.any(difference > limit):
+            raise ValueError(f"Skompilowany model niezgodny z XGBoost (maks. różnica {difference.max():.3g}).")
+        self.max_difference = float(difference.max()) if len(difference) else 0.0
+        return self.max_difference
+
+    def save(self, path):
+        np.savez(
+            path,
+            feature=self.feature, threshold=self.threshold, left=self.left, right=self.right,
+            default_left=self.default_left, value=self.value, roots=self.roots,
+            base_score=self.base_score, max_depth=self.max_depth,
+            feature_names=np.asarray(self.feature_names, dtype=str),
+        )
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path) as arrays:
+            return cls(
+                arrays["feature"], arrays["threshold"], arrays["left"], arrays["right"],
+                arrays["default_left"], arrays["value"], arrays["roots"],
+                float(arrays["base_score"]), int(arrays["max_depth"]), arrays["feature_names"].tolist(),
+            )
@@ -0,0 +1,214 @@
+# models/tuning.py
+"""
+Strojenie hiperparametrów modeli BD – osobno dla materiałów CZ i N.
+
+    python -m models.tuning
+    python -m models.tuning --estimators 25 50 100 200 --depths 3 4 5 6 --tolerance 0.05 --dry-run
+
+Dla każdej pary (materiał, max_depth) zadanie w puli procesów wykonuje walidację krzyżową
+(k-fold): model trenowany jest raz na największą liczbę drzew, a błąd dla mniejszych liczb drzew
+liczony jest z predykcji obciętych do pierwszych n drzew (iteration_range). Model z pełnych danych
+wraca do procesu głównego, gdzie – już po zakończeniu puli, sekwencyjnie – jest kompilowany do
+TreeEnsemble (tym samym silnikiem liczy aplikacja) i mierzony jest czas predykcji wsadu (na wiersz)
+i pojedynczego gięcia dla pierwszych n drzew.
+
+Wybierana jest konfiguracja o najmniejszym czasie predykcji wsadu, której RMSE nie przekracza
+najlepszego RMSE materiału o więcej niż --tolerance; zapisywana jest w config/model_params.json
+i używana przez BDModel.train_models przy kolejnym treningu.
+"""
+import argparse
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import numpy as np
+
+from models.bd_model import FEATURES, MODEL_PARAMS, MODEL_PARAMS_FILE, TARGETS, load_model_params, save_model_params
+from models.tree_ensemble import TreeEnsemble
+
+ESTIMATORS = [25, 50, 100, 150, 200, 300]
+DEPTHS = [2, 3, 4, 5, 6, 8]
+
+
+def _folds(n_rows, n_folds, seed):
+    """Losowy podział indeksów wierszy na n_folds części."""
+    order = np.random.default_rng(seed).permutation(n_rows)
+    return np.array_split(order, n_folds)
+
+
+def _time_per_row(model, X, repeats, rounds=5):
+    """Czas predykcji (µs) na wiersz dla wsadu X modelem TreeEnsemble – najlepszy z rounds pomiarów."""
+    model.predict(X)
+    best = float("inf")
+    for _ in range(rounds):
+        start = time.perf_counter()
+        for _ in range(repeats):
+            model.predict(X)
+        best = min(best, time.perf_counter() - start)
+    return 1e6 * best / (repeats * len(X))
+
+
+def evaluate_depth(X, y, max_depth, estimators, learning_rate, n_folds, seed):
+    """
+    Walidacja krzyżowa dla jednej głębokości drzew i wszystkich liczb drzew.
+    Zwraca (lista słowników n_estimators, max_depth, rmse, mae; model z pełnych danych jako bytearray).
+    Uruchamiana w procesie roboczym – XGBoost na jednym wątku.
+    """
+    import xgboost as xgb
+
+    params = {"objective": "reg:squarederror", "max_depth": max_depth, "eta": learning_rate, "nthread": 1}
+    max_estimators = max(estimators)
+    squared = {n: 0.0 for n in estimators}
+    absolute = {n: 0.0 for n in estimators}
+    for fold in _folds(len(y), n_folds, seed):
+        train = np.ones(len(y), dtype=bool)
+        train[fold] = False
+        booster = xgb.train(params, xgb.DMatrix(X[train], label=y[train], feature_names=FEATURES),
+                            num_boost_round=max_estimators)
+        for n in estimators:
+            error = booster.inplace_predict(X[fold], iteration_range=(0, n)) - y[fold]
+            squared[n] += float(np.sum(error ** 2))
+            absolute[n] += float(np.sum(np.abs(error)))
+
+    booster = xgb.train(params, xgb.DMatrix(X, label=y, feature_names=FEATURES), num_boost_round=max_estimators)
+    results = [{
+        "n_estimators": n,
+        "max_depth": max_depth,
+        "rmse": float(np.sqrt(squared[n] / len(y))),
+        "mae": absolute[n] / len(y),
+    } for n in estimators]
+    return results, booster.save_raw()
+
+
+def measure_latency(raw_model, X, results):
+    """
+    Uzupełnia wyniki jednej głębokości o czasy predykcji skompilowanego modelu (TreeEnsemble, jak
+    w aplikacji) ograniczonego do pierwszych n_estimators drzew: batch_us (wsad 1000 wierszy, na wiersz)
+    i single_us (pojedyncze gięcie – głównie stały narzut wywołania).
+    """
+    from xgboost import Booster
+
+    compiled = TreeEnsemble.from_booster(Booster(model_file=raw_model))
+    batch = X[np.arange(1000) % len(X)]
+    for result in results:
+        model = compiled.first_trees(result["n_estimators"])
+        result["batch_us"] = _time_per_row(model, batch, repeats=10)
+        result["single_us"] = _time_per_row(model, X[:1], repeats=100)
+
+
+def _evaluate_task(X, y, name, max_depth, estimators, learning_rate, n_folds, seed):
+    return name, evaluate_depth(X, y, max_depth, estimators, learning_rate, n_folds, seed)
+
+
+def choose(results, tolerance):
+    """Najszybsza (czas wsadu na wiersz) konfiguracja z RMSE <= najlepsze RMSE * (1 + tolerance)."""
+    best_rmse = min(result["rmse"] for result in results)
+    accepted = [result for result in results if result["rmse"] <= best_rmse * (1 + tolerance)]
+    return min(accepted, key=lambda result: (result["batch_us"], result["rmse"]))
+
+
+def tune(data, estimators=ESTIMATORS, depths=DEPTHS, learning_rate=MODEL_PARAMS["learning_rate"],
+         n_folds=5, workers=None, seed=0):
+    """
+    Przeszukuje siatkę (n_estimators x max_depth) dla każdego materiału w puli procesów.
+    Zwraca {materiał: lista wyników (z czasami z measure_latency) posortowana po czasie predykcji wsadu}.
+    """
+    X = data[FEATURES].to_numpy(dtype=np.float64)
+    estimators = sorted(set(estimators))
+    results = {name: [] for name in TARGETS}
+    models = []
+    tasks = [(name, depth) for name in TARGETS for depth in sorted(set(depths))]
+    workers = min(workers or os.cpu_count() or 1, len(tasks))
+    print(f"Strojenie: {len(X)} wierszy, {n_folds}-krotna walidacja, {len(tasks)} zadań w {workers} proc.")
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        futures = [
+            executor.submit(_evaluate_task, X, data[TARGETS[name]].to_numpy(dtype=np.float64), name, depth,
+                            estimators, learning_rate, n_folds, seed)
+            for name, depth in tasks
+        ]
+        for done, future in enumerate(as_completed(futures), start=1):
+            name, (depth_results, raw_model) = future.result()
+            results[name].extend(depth_results)
+            models.append((raw_model, depth_results))
+            print(f"[{done}/{len(tasks)}] {name}, max_depth={depth_results[0]['max_depth']}")
+
+    # Pomiary czasu dopiero po zamknięciu puli – bez konkurencji innych procesów o rdzenie
+    print("Pomiar czasu predykcji...")
+    for raw_model, depth_results in models:
+        measure_latency(raw_model, X, depth_results)
+    for name in results:
+        results[name].sort(key=lambda result: result["batch_us"])
+    return results
+
+
+def print_report(results, chosen, current):
+    """Tabela kompromisu dokładność / czas predykcji dla każdego materiału."""
+    for name, rows in results.items():
+        print(f"\nMateriał {name} (bieżące: n_estimators={current[name]['n_estimators']}, "
+              f"max_depth={current[name]['max_depth']})")
+        print(f"{'drzewa':>7} {'głęb.':>5} {'RMSE':>8} {'MAE':>8} {'wsad µs/wiersz':>15} {'1 gięcie µs':>12}")
+        for row in rows:
+            mark = " <- wybrana" if row is chosen[name] else ""
+            print(f"{row['n_estimators']:>7} {row['max_depth']:>5} {row['rmse']:>8.4f} {row['mae']:>8.4f} "
+                  f"{row['batch_us']:>15.3f} {row['single_us']:>12.1f}{mark}")
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Strojenie hiperparametrów modeli BD (dokładność vs czas predykcji).")
+    parser.add_argument("--estimators", type=int, nargs="+", default=ESTIMATORS, help="liczby drzew")
+    parser.add_argument("--depths", type=int, nargs="+", default=DEPTHS, help="głębokości drzew")
+    parser.add_argument("--learning-rate", type=float, default=MODEL_PARAMS["learning_rate"])
+    parser.add_argument("--folds", type=int, default=5, help="liczba części walidacji krzyżowej")
+    parser.add_argument("--tolerance", type=float, default=0.05,
+                        help="dopuszczalny względny wzrost RMSE ponad najlepszy (domyślnie 5%%)")
+    parser.add_argument("-j", "--workers", type=int, default=None, help="liczba procesów (domyślnie liczba rdzeni)")
+    parser.add_argument("--output", default=MODEL_PARAMS_FILE, help="plik konfiguracji hiperparametrów")
+    parser.add_argument("--dry-run", action="store_true", help="tylko raport, bez zapisu konfiguracji")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    from data.data_loader import load_data
+
+    args = parse_args(argv)
+    try:
+        data = load_data(mmap=True)  # tylko odczyt – kolumny mapowane zamiast kopiowane
+    except FileNotFoundError as e:
+        print(e, file=sys.stderr)
+        return 1
+    if data is None or data.empty:
+        print("Brak danych treningowych.", file=sys.stderr)
+        return 1
+    data = data.dropna(subset=FEATURES + list(TARGETS.values()))
+    if len(data) < args.folds:
+        print(f"Za mało danych do {args.folds}-krotnej walidacji ({len(data)} wierszy).", file=sys.stderr)
+        return 1
+
+    start = time.perf_counter()
+    results = tune(data, args.estimators, args.depths, args.learning_rate, args.folds, args.workers)
+    chosen = {name: choose(rows, args.tolerance) for name, rows in results.items()}
+    print_report(results, chosen, load_model_params(args.output))
+    print(f"\nStrojenie zakończone w {time.perf_counter() - start:.1f} s.")
+
+    if args.dry_run:
+        return 0
+    params = {
+        name: {"n_estimators": row["n_estimators"], "max_depth": row["max_depth"], "learning_rate": args.learning_rate}
+        for name, row in chosen.items()
+    }
+    report = {
+        "timestamp": time.strftime("%Y-%m-%d %H:%M:%S"),
+        "rows": len(data),
+        "folds": args.folds,
+        "tolerance": args.tolerance,
+        "results": {name: {key: round(value, 6) if isinstance(value, float) else value for key, value in row.items()}
+                    for name, row in chosen.items()},
+    }
+    save_model_params(params, report, args.output)
+    print("Nowe hiperparametry zostaną użyte przy kolejnym treningu modeli.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
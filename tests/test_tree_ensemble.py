@@ -0,0 +1,97 @@
+# tests/test_tree_ensemble.py
+# Zgodność skompilowanego modelu (TreeEnsemble) z XGBRegressor.predict
+import numpy as np
+import pytest
+
+xgb = pytest.importorskip("xgboost")
+
+from models.bd_model import FEATURES, BDModel, BoosterModel
+from models.tree_ensemble import TreeEnsemble
+
+
+def _regressor(max_depth=5, n_estimators=50, missing_fraction=0.1, seed=0):
+    """XGBRegressor na danych podobnych do BD; część wartości brakujących – drzewa uczą się kierunków domyślnych."""
+    rng = np.random.default_rng(seed)
+    n = 2000
+    X = np.column_stack((
+        rng.choice([0.5, 1.0, 1.5, 2.0, 3.0], n),
+        rng.choice([6.0, 10.0, 16.0, 24.0], n),
+        rng.uniform(30.0, 180.0, n),
+    ))
+    y = 1.7 * X[:, 0] + 0.05 * X[:, 1] + 0.01 * (180.0 - X[:, 2]) + rng.normal(0, 0.02, n)
+    X[rng.random(X.shape) < missing_fraction] = np.nan
+    regressor = xgb.XGBRegressor(n_estimators=n_estimators, max_depth=max_depth, learning_rate=0.1)
+    regressor.fit(X, y)
+    return regressor
+
+
+def _assert_parity(model, regressor, X):
+    expected = regressor.predict(X).astype(np.float64)
+    np.testing.assert_allclose(model.predict(X), expected, rtol=1e-5, atol=1e-5)
+
+
+@pytest.mark.parametrize("max_depth", [2, 5, 8])
+def test_random_rows(max_depth):
+    regressor = _regressor(max_depth=max_depth)
+    model = TreeEnsemble.from_booster(regressor.get_booster())
+    rng = np.random.default_rng(1)
+    X = np.column_stack((rng.uniform(0, 4, 500), rng.uniform(4, 30, 500), rng.uniform(0, 200, 500)))
+    _assert_parity(model, regressor, X)
+
+
+def test_values_equal_to_thresholds():
+    regressor = _regressor()
+    model = TreeEnsemble.from_booster(regressor.get_booster())
+    rows = []
+    for feature in range(len(FEATURES)):
+        splits = model.split_values(feature).astype(np.float32)
+        for offset in (0.0, -1e-6, 1e-6):
+            X = np.tile(np.float32([1.5, 10.0, 90.0]), (len(splits), 1))
+            X[:, feature] = splits + np.float32(offset)
+            rows.append(X)
+    X = np.concatenate(rows)
+    _assert_parity(model, regressor, X)
+    _assert_parity(model, regressor, model.verification_rows())
+
+
+def test_missing_values():
+    regressor = _regressor(missing_fraction=0.2)
+    model = TreeEnsemble.from_booster(regressor.get_booster())
+    X = model.verification_rows(1000)
+    rng = np.random.default_rng(2)
+    X[rng.random(X.shape) < 0.3] = np.nan
+    X[:10] = np.nan
+    _assert_parity(model, regressor, X)
+
+
+def test_save_load_round_trip(tmp_path):
+    regressor = _regressor()
+    model = TreeEnsemble.from_booster(regressor.get_booster())
+    model.save(tmp_path / "model.npz")
+    loaded = TreeEnsemble.load(tmp_path / "model.npz")
+    X = model.verification_rows(500)
+    np.testing.assert_array_equal(loaded.predict(X), model.predict(X))
+    assert loaded.feature_names == model.feature_names
+
+
+def test_first_trees_matches_iteration_range():
+    regressor = _regressor()
+    booster = regressor.get_booster()
+    model = TreeEnsemble.from_booster(booster)
+    X = model.verification_rows(500)
+    expected = booster.inplace_predict(X, iteration_range=(0, 10))
+    np.testing.assert_allclose(model.first_trees(10).predict(X), expected, rtol=1e-5, atol=1e-5)
+
+
+def test_verify_mismatch_falls_back_to_booster(monkeypatch):
+    regressor = _regressor()
+    booster = regressor.get_booster()
+
+    def mismatch(self, model, X=None, tolerance=1e-4):
+        raise ValueError("niezgodność")
+
+    monkeypatch.setattr(TreeEnsemble, "verify", mismatch)
+    model_CZ, model_N = BDModel._compile_models(booster, booster)
+    assert isinstance(model_CZ, BoosterModel) and isinstance(model_N, BoosterModel)
+    X = np.float32([[1.5, 10.0, 90.0]])
+    np.testing.assert_allclose(model_CZ.predict(X), regressor.predict(X), rtol=1e-6)
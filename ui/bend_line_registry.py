@@ -0,0 +1,56 @@
+# ui/bend_line_registry.py
+from PyQt5.QtCore import QPersistentModelIndex
+
+
+class BendLineRegistry:
+    """
+    Dwukierunkowe powiązanie linii gięcia z wierszami tabeli segmentów.
+    Linie dostają stałe identyfikatory (kolejne liczby) przy wczytaniu DXF, a wiersze trzymamy
+    jako QPersistentModelIndex – Qt aktualizuje je przy wstawianiu i usuwaniu wierszy,
+    więc oba kierunki wyszukania są O(1) niezależnie od wielkości sceny i tabeli.
+    """
+    LINE_ID_ROLE = 2  # klucz setData/data elementu sceny z identyfikatorem linii
+
+    def __init__(self):
+        self._lines = []
+        self._rows = {}
+
+    def clear(self):
+        self._lines = []
+        self._rows = {}
+
+    def register_line(self, item):
+        """Nadaje linii kolejny identyfikator i zwraca go."""
+        line_id = len(self._lines)
+        item.setData(self.LINE_ID_ROLE, line_id)
+        self._lines.append(item)
+        return line_id
+
+    def line(self, line_id):
+        if line_id is None or not 0 <= line_id < len(self._lines):
+            return None
+        return self._lines[line_id]
+
+    def lines(self):
+        return list(self._lines)
+
+    @classmethod
+    def line_id(cls, item):
+        return item.data(cls.LINE_ID_ROLE)
+
+    def bind_row(self, line_id, row_index):
+        """Wiąże linię z wierszem tabeli (QModelIndex lub QPersistentModelIndex)."""
+        self._rows[line_id] = QPersistentModelIndex(row_index)
+
+    def unbind_row(self, line_id):
+        self._rows.pop(line_id, None)
+
+    def clear_rows(self):
+        self._rows = {}
+
+    def row(self, line_id):
+        """Bieżący numer wiersza powiązanego z linią albo None."""
+        row_index = self._rows.get(line_id)
+        if row_index is None or not row_index.isValid():
+            return None
+        return row_index.row()
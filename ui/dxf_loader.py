@@ -0,0 +1,42 @@
+# ui/dxf_loader.py
+import threading
+from PyQt5.QtCore import QThread, pyqtSignal
+from data.dxf_geometry import iter_dxf_batches
+from data.dxf_cache import dxf_geometry_cache
+
+
+class DxfLoadWorker(QThread):
+    """
+    Parsuje plik DXF w osobnym wątku i przekazuje geometrię paczkami (GeometryBatch).
+    Elementy sceny tworzone są w wątku GUI – zob. CustomGraphicsView.load_dxf.
+    """
+    batch_ready = pyqtSignal(object)
+    progress = pyqtSignal(int)
+    finished_loading = pyqtSignal()
+    cancelled = pyqtSignal()
+    failed = pyqtSignal(str)
+
+    def __init__(self, file_path, parent=None, cache=dxf_geometry_cache):
+        super().__init__(parent)
+        self.file_path = file_path
+        self.cache = cache
+        self._cancel_event = threading.Event()
+
+    def cancel(self):
+        self._cancel_event.set()
+
+    def is_cancelled(self):
+        return self._cancel_event.is_set()
+
+    def run(self):
+        try:
+            for batch, processed, total in iter_dxf_batches(self.file_path, cancel_event=self._cancel_event,
+                                                             cache=self.cache):
+                self.batch_ready.emit(batch)
+                self.progress.emit(int(100 * processed / total) if total else 100)
+            if self._cancel_event.is_set():
+                self.cancelled.emit()
+            else:
+                self.finished_loading.emit()
+        except Exception as e:
+            self.failed.emit(str(e))
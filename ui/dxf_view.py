@@ -1,12 +1,73 @@
 # ui/dxf_view.py
-from PyQt5.QtWidgets import QGraphicsView, QGraphicsScene, QGraphicsLineItem
-from PyQt5.QtCore import Qt, QRectF, QLineF, QPointF
-from PyQt5.QtGui import QPainter, QPen, QColor, QPainterPath
-import ezdxf
+from collections import deque
+import numpy as np
 import math
+from PyQt5.QtWidgets import QGraphicsView, QGraphicsScene, QGraphicsLineItem, QGraphicsItem, QWidget
+from PyQt5.QtCore import Qt, QRectF, QLineF, QPointF, QTimer, pyqtSignal
+from PyQt5.QtGui import QPainter, QPen, QColor, QPainterPath, QPolygonF, QTransform
+from ui.dxf_loader import DxfLoadWorker
+from ui.bend_line_registry import BendLineRegistry
+from utils.spatial_index import LineGridIndex
+from data.bend_analysis import analyze_bends
+from data.dxf_geometry import GeometryBounds
+
+def _polygon(points):
+    """Tablica NumPy (n, 2) -> QPolygonF bez pętli w Pythonie (kopiowanie do bufora punktów)."""
+    polygon = QPolygonF(len(points))
+    buffer = polygon.data()
+    buffer.setsize(len(points) * 2 * 8)
+    np.frombuffer(buffer, dtype=np.float64)[:] = np.ascontiguousarray(points, dtype=np.float64).ravel()
+    return polygon
+
+
+class ContourTileItem(QGraphicsItem):
+    """
+    Kafel konturu: geometria jednej pary (warstwa, kolor) z jednego kwadratu siatki sceny.
+    Prymitywy są pogrupowane w ścieżki wg rozmiaru (przedziały potęg dwójki), więc przy małym
+    powiększeniu pomijamy całe ścieżki elementów mniejszych niż min_feature_px pikseli.
+    Kafel nie bierze udziału w trafianiu myszą – pusty kształt oszczędza scenie obrysowywania ścieżek.
+    """
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.pen = QPen()
+        self.min_feature_px = 1.0
+        self._levels = []  # (przedział rozmiaru, ścieżka) – od największych elementów
+        self._bounding_rect = QRectF()
+
+    def set_levels(self, levels):
+        self.prepareGeometryChange()
+        self._levels = sorted(levels.items(), reverse=True)
+        rect = QRectF()
+        for _, path in self._levels:
+            rect = rect.united(path.controlPointRect())
+        half_pen = self.pen.widthF() / 2
+        self._bounding_rect = rect.adjusted(-half_pen, -half_pen, half_pen, half_pen)
+        self.update()
+
+    def boundingRect(self):
+        return self._bounding_rect
+
+    def shape(self):
+        return QPainterPath()
+
+    def paint(self, painter, option, widget=None):
+        lod = option.levelOfDetailFromTransform(painter.worldTransform())
+        painter.setPen(self.pen)
+        painter.setBrush(Qt.NoBrush)
+        for size_level, path in self._levels:
+            # Elementy przedziału mają rozmiar < 2^(przedział+1) jednostek sceny
+            if 2.0 ** (size_level + 1) * lod < self.min_feature_px:
+                break
+            painter.drawPath(path)
+
 
 class CustomGraphicsView(QGraphicsView):
     """Widok z obsługą wczytywania pliku DXF, panningu, zoomu oraz rysowania linii centralnych."""
+    load_progress = pyqtSignal(int)
+    load_finished = pyqtSignal()
+    load_cancelled = pyqtSignal()
+    load_failed = pyqtSignal(str)
+
     def __init__(self):
         super().__init__()
         # Tworzymy jedyną scenę w całym projekcie
@@ -26,98 +87,305 @@ class CustomGraphicsView(QGraphicsView):
         self.setCursor(Qt.ArrowCursor)
         self.main_window = None
 
+        # Wczytywanie DXF w tle: wątek parsuje plik, a scena wypełniana jest paczkami z timera
+        self._load_worker = None
+        self._pending_batches = deque()
+        self._worker_done = False
+        self._populate_timer = QTimer(self)
+        self._populate_timer.setInterval(0)
+        self._populate_timer.timeout.connect(self._populate_step)
+
+        # Kontur rysowany zbiorczo: kafle (ContourTileItem) na parę (warstwa, kolor) i kwadrat tile_size.
+        # Pojedynczymi elementami pozostają tylko linie gięcia, bo to z nimi użytkownik wchodzi w interakcję.
+        # merge_contours = False przywraca tryb "jeden element na prymityw" (np. do diagnostyki).
+        self.merge_contours = True
+        self.tile_size = 250.0
+        self._contour_paths = {}
+        self._contour_items = {}
+        self._block_levels = {}
+        self._block_items = []
+
+        # Poziomy szczegółowości: poniżej antialias_min_zoom (piksele na jednostkę rysunku) rysujemy
+        # bez antyaliasingu, a kafle mieszczące się w tile_cache_max_px pikseli trzymamy jako bitmapy
+        # (przesuwanie widoku to wtedy kopiowanie gotowych obrazów)
+        self.antialias_min_zoom = 1.0
+        self.tile_cache_max_px = 1024
+        self.min_feature_px = 2.0
+        self._tile_cache_mode = QGraphicsItem.NoCache
+
+        # Linie gięcia (stałe id w rejestrze) i ich indeks przestrzenny (budowany po wczytaniu)
+        self.pick_tolerance = 20.0
+        self.bend_lines = BendLineRegistry()
+        self._bending_index = None
+        self._hover_item = None
+        self._bending_coords = np.empty((0, 4))
+        self._bend_layers = []
+        self._texts = []
+        self._bounds = GeometryBounds()
+        self.bend_analysis = None  # BendAnalysis wczytanego rysunku (zob. analyze_bends)
+
+        # Elementy sceny zostają we współrzędnych pliku DXF; współrzędne detalu (od lewego dolnego
+        # narożnika rysunku) to współrzędne sceny minus origin
+        self.origin = QPointF(0, 0)
+
     def scene(self):
         """Zwraca obiekt sceny, aby segment_manager iterował po tej samej scenie."""
         return self._scene
 
     def load_dxf(self, file_path):
-        """Wczytuje plik DXF do sceny."""
-        doc = ezdxf.readfile(file_path)
+        """
+        Rozpoczyna wczytywanie pliku DXF do sceny. Parsowanie odbywa się w wątku w tle,
+        a elementy dodawane są paczkami, więc widok pozostaje responsywny.
+        Zakończenie sygnalizują load_finished / load_cancelled / load_failed.
+        """
+        self.cancel_loading(emit_signal=False)
+        self._clear_scene()
+        self._pending_batches.clear()
+        self._worker_done = False
+
+        self._load_worker = DxfLoadWorker(file_path, self)
+        self._load_worker.batch_ready.connect(self._on_batch_ready)
+        self._load_worker.progress.connect(self._on_worker_progress)
+        self._load_worker.finished_loading.connect(self._on_worker_finished)
+        self._load_worker.cancelled.connect(self._on_worker_cancelled)
+        self._load_worker.failed.connect(self._on_worker_failed)
+        self._load_worker.start()
+        self._populate_timer.start()
+
+    def is_loading(self):
+        return self._load_worker is not None
+
+    def cancel_loading(self, emit_signal=True):
+        """Przerywa trwające wczytywanie i czyści częściowo wypełnioną scenę."""
+        if self._load_worker is None:
+            return
+        self._load_worker.cancel()
+        self._load_worker = None
+        self._populate_timer.stop()
+        self._pending_batches.clear()
+        self._clear_scene()
+        if emit_signal:
+            self.load_cancelled.emit()
+
+    def _clear_scene(self):
         self._scene.clear()
+        self._contour_paths = {}
+        self._contour_items = {}
+        self._block_levels = {}
+        self._block_items = []
+        self.bend_lines.clear()
+        self._bending_index = None
+        self._hover_item = None
+        self._bending_coords = np.empty((0, 4))
+        self._bend_layers = []
+        self._texts = []
+        self._bounds = GeometryBounds()
+        self.bend_analysis = None
+        self.origin = QPointF(0, 0)
+
+    def _on_batch_ready(self, batch):
+        if self.sender() is self._load_worker:
+            self._pending_batches.append(batch)
+
+    def _on_worker_progress(self, percent):
+        if self.sender() is self._load_worker:
+            self.load_progress.emit(percent)
+
+    def _on_worker_finished(self):
+        if self.sender() is self._load_worker:
+            self._worker_done = True
+
+    def _on_worker_cancelled(self):
+        # Wątek przerwany poza cancel_loading (np. worker.cancel()) – ta sama ścieżka czyszczenia
+        if self.sender() is self._load_worker:
+            self.cancel_loading()
+
+    def _on_worker_failed(self, error):
+        if self.sender() is not self._load_worker:
+            return
+        self.cancel_loading(emit_signal=False)
+        self.load_failed.emit(error)
+
+    def _populate_step(self):
+        """Dodaje do sceny jedną paczkę geometrii na cykl pętli zdarzeń."""
+        if self._pending_batches:
+            self._add_batch(self._pending_batches.popleft())
+        elif self._worker_done:
+            self._populate_timer.stop()
+            self._load_worker = None
+            self._finish_loading()
 
-        for entity in doc.modelspace():
-            if entity.dxftype() == 'LINE':
-                start, end = entity.dxf.start, entity.dxf.end
-                if hasattr(entity.dxf, 'color') and entity.dxf.color == 2:
-                    # bending line
-                    pen = QPen(QColor("yellow"))
-                    line_item = QGraphicsLineItem(start.x, start.y, end.x, end.y)
-                    line_item.setData(0, "bending")  # identyfikacja
-                    line_item.setPen(pen)
-                    self._scene.addItem(line_item)
-                else:
-                    self._scene.addLine(start.x, start.y, end.x, end.y)
-            elif entity.dxftype() == 'CIRCLE':
-                center = entity.dxf.center
-                radius = entity.dxf.radius
-                self._scene.addEllipse(center.x - radius, center.y - radius, 2 * radius, 2 * radius)
-            elif entity.dxftype() == 'ARC':
-                center = entity.dxf.center
-                radius = entity.dxf.radius
-                start_angle = entity.dxf.start_angle
-                end_angle = entity.dxf.end_angle
-                rect = QRectF(center.x - radius, center.y - radius, 2 * radius, 2 * radius)
-                path = QPainterPath()
-                path.arcMoveTo(rect, start_angle)
-                path.arcTo(rect, start_angle, (end_angle - start_angle))
-                self._scene.addPath(path)
-            elif entity.dxftype() == 'POLYLINE':
-                points = list(entity.points())
-                for i in range(len(points) - 1):
-                    self._scene.addLine(points[i][0], points[i][1],
-                                        points[i + 1][0], points[i + 1][1])
-            elif entity.dxftype() == 'LWPOLYLINE':
-                points = list(entity.points())
-                for i in range(len(points)):
-                    start_point = points[i]
-                    end_point = points[(i + 1) % len(points)]
-                    bulge = start_point[4] if len(start_point) > 4 else 0
-                    if bulge == 0:
-                        self._scene.addLine(start_point[0], start_point[1],
-                                            end_point[0], end_point[1])
-                    else:
-                        self.draw_bulge_arc(start_point, end_point, bulge)
-            else:
-                print(f"Nieobsługiwany typ: {entity.dxftype()}")
+    def _add_batch(self, batch):
+        for name, geometry in batch.blocks:
+            self._add_block_definition(name, geometry)
+        if self.merge_contours:
+            self._add_contour_paths(batch)
+        else:
+            self._add_contour_items(batch)
+        self._add_block_instances(batch)
+        self._bounds.update(batch)
+        pen = QPen(QColor("yellow"))
+        for layer, x1, y1, x2, y2 in batch.bending_lines:
+            line_item = QGraphicsLineItem(x1, y1, x2, y2)
+            line_item.setData(0, "bending")  # identyfikacja
+            line_item.setPen(pen)
+            self._scene.addItem(line_item)
+            self.bend_lines.register_line(line_item)
+            self._bend_layers.append(layer)
+        self._texts.extend(batch.texts)
+
+    @staticmethod
+    def _append_geometry(batch, path_for):
+        """
+        Dopisuje prymitywy paczki do ścieżek wskazanych przez path_for(warstwa, kolor, x, y, rozmiar).
+        Kąty łuków DXF rosną przeciwnie do zegara przy osi Y w górę, a QPainterPath liczy je przy osi Y
+        w dół – stąd zmiana znaku kątów (scena jest we współrzędnych DXF).
+        """
+        for layer, color, x1, y1, x2, y2 in batch.lines:
+            path = path_for(layer, color, (x1 + x2) / 2, (y1 + y2) / 2, max(abs(x2 - x1), abs(y2 - y1)))
+            path.moveTo(x1, y1)
+            path.lineTo(x2, y2)
+        for layer, color, cx, cy, r in batch.circles:
+            path_for(layer, color, cx, cy, 2 * r).addEllipse(QPointF(cx, cy), r, r)
+        for layer, color, cx, cy, r, start_angle, span in batch.arcs:
+            path = path_for(layer, color, cx, cy, 2 * r)
+            rect = QRectF(cx - r, cy - r, 2 * r, 2 * r)
+            path.arcMoveTo(rect, -start_angle)
+            path.arcTo(rect, -start_angle, -span)
+        for layer, color, points in batch.polylines:
+            low, high = points.min(axis=0), points.max(axis=0)
+            center = (low + high) / 2
+            path = path_for(layer, color, center[0], center[1], float((high - low).max()))
+            path.addPolygon(_polygon(points))
+
+    @staticmethod
+    def _size_level(size):
+        return math.floor(math.log2(size)) if size > 0 else -64
+
+    def _add_contour_paths(self, batch):
+        """Dopisuje prymitywy paczki do ścieżek kafli (warstwa, kolor, kafel, przedział rozmiaru)."""
+        touched = set()
+
+        def path_for(layer, color, x, y, size):
+            key = (layer, color, math.floor(x / self.tile_size), math.floor(y / self.tile_size))
+            touched.add(key)
+            levels = self._contour_paths.setdefault(key, {})
+            return levels.setdefault(self._size_level(size), QPainterPath())
+
+        self._append_geometry(batch, path_for)
+        for key in touched:
+            item = self._contour_items.get(key)
+            if item is None:
+                item = self._new_contour_item()
+                self._contour_items[key] = item
+            item.set_levels(self._contour_paths[key])
+
+    def _new_contour_item(self):
+        item = ContourTileItem()
+        item.setData(0, "contour")
+        # Kontur nie reaguje na mysz – kliknięcia i najechania obsługują wyłącznie linie gięcia
+        item.setAcceptedMouseButtons(Qt.NoButton)
+        item.setAcceptHoverEvents(False)
+        item.min_feature_px = self.min_feature_px
+        item.setCacheMode(self._tile_cache_mode)
+        self._scene.addItem(item)
+        return item
 
+    def _add_block_definition(self, name, geometry):
+        """Ścieżki bloku budowane są raz; instancje współdzielą je (QPainterPath jest współdzielona niejawnie)."""
+        levels = {}
+        self._append_geometry(
+            geometry, lambda layer, color, x, y, size: levels.setdefault(self._size_level(size), QPainterPath()))
+        self._block_levels[name] = levels
+
+    def _add_block_instances(self, batch):
+        for _, _, name, m11, m12, m21, m22, dx, dy in batch.inserts:
+            levels = self._block_levels.get(name)
+            if not levels:
+                continue
+            item = self._new_contour_item()
+            item.set_levels(levels)
+            item.setTransform(QTransform(m11, m12, m21, m22, dx, dy))
+            self._block_items.append(item)
+
+    def _add_contour_items(self, batch):
+        """Tryb diagnostyczny: osobny element sceny na każdy prymityw."""
+        paths = []
+
+        def path_for(layer, color, x, y, size):
+            paths.append(QPainterPath())
+            return paths[-1]
+
+        self._append_geometry(batch, path_for)
+        for path in paths:
+            self._scene.addPath(path)
+
+    def _finish_loading(self):
         # Po wczytaniu – wyśrodkuj scenę w widoku
         self.adjust_scene_origin()
+        self._build_bending_index()
+        self.analyze_bends()
         self.resetTransform()
         self.scale(1, -1)
         self.center_dxf_in_view()
+        self.load_progress.emit(100)
+        self.load_finished.emit()
 
-    def draw_bulge_arc(self, start_point, end_point, bulge):
-        """Rysowanie łuku z uwzględnieniem 'bulge'."""
-        chord_length = math.sqrt((end_point[0] - start_point[0])**2 + (end_point[1] - start_point[1])**2)
-        if chord_length == 0:
-            return
-        radius = abs(chord_length / (2 * math.sin(2 * math.atan(bulge))))
-        center_x = (start_point[0] + end_point[0]) / 2
-        center_y = (start_point[1] + end_point[1]) / 2
+    def adjust_scene_origin(self):
+        """
+        Ustala początek układu detalu w minimalnych x,y rysunku i obszar sceny z marginesem.
+        Elementów nie przesuwamy – przeliczenie robi part_point().
+        """
+        bounding_rect = self._scene.itemsBoundingRect()
+        # Dokładny zasięg geometrii (bez grubości pióra) – te same współrzędne co w trybie wsadowym
+        if self._bounds.rect is not None:
+            self.origin = QPointF(self._bounds.rect[0], self._bounds.rect[1])
+        else:
+            self.origin = bounding_rect.topLeft()
 
-        start_angle = math.degrees(math.atan2(start_point[1] - center_y, start_point[0] - center_x))
-        end_angle = math.degrees(math.atan2(end_point[1] - center_y, end_point[0] - center_x))
-        rect = QRectF(center_x - radius, center_y - radius, 2 * radius, 2 * radius)
+        margin = 5000
+        self._scene.setSceneRect(bounding_rect.adjusted(-margin, -margin, margin, margin))
 
-        path = QPainterPath()
-        path.arcMoveTo(rect, start_angle)
-        arc_span = end_angle - start_angle
-        path.arcTo(rect, start_angle, arc_span)
-        self._scene.addPath(path)
+    def part_point(self, scene_pos):
+        """Współrzędne sceny -> współrzędne detalu (minimalne x,y rysunku w (0,0))."""
+        return scene_pos - self.origin
 
-    def adjust_scene_origin(self):
-        """Przesuwa elementy, aby minimalne x,y były w (0,0)."""
-        bounding_rect = self._scene.itemsBoundingRect()
-        dx = -bounding_rect.left()
-        dy = -bounding_rect.top()
+    def _build_bending_index(self):
+        coords = []
+        # Kolejność jak w rejestrze – pozycja w indeksie jest identyfikatorem linii
+        for item in self.bend_lines.lines():
+            line = item.line()
+            p1 = item.mapToScene(line.p1())
+            p2 = item.mapToScene(line.p2())
+            coords.append((p1.x(), p1.y(), p2.x(), p2.y()))
+        coords = np.asarray(coords, dtype=float).reshape(-1, 4)
+        self._bending_coords = coords
+        self._bending_index = LineGridIndex(coords[:, 0], coords[:, 1], coords[:, 2], coords[:, 3])
 
-        for item in self._scene.items():
-            item.moveBy(dx, dy)
+    def analyze_bends(self):
+        """Grupuje linie gięcia w gięcia (pozycje od początku detalu, kąty z opisów i warstw)."""
+        self.bend_analysis = analyze_bends(self._bending_coords, self._bend_layers, self._texts,
+                                           bounds=self._bounds.rect)
+        skipped = len(self.bend_analysis.skipped)
+        if skipped:
+            print(f"Pominięto {skipped} linii gięcia nierównoległych do pozostałych.")
+        return self.bend_analysis
 
-        new_rect = self._scene.itemsBoundingRect()
-        margin = 5000
-        new_rect = new_rect.adjusted(-margin, -margin, margin, margin)
-        self._scene.setSceneRect(new_rect)
+    def bending_line_at(self, pos):
+        """Najbliższa linia gięcia w promieniu pick_tolerance od punktu sceny albo None."""
+        if self._bending_index is None:
+            return None
+        line_id, _ = self._bending_index.nearest(pos.x(), pos.y(), self.pick_tolerance)
+        return self.bend_lines.line(line_id)
+
+    def _set_hover_item(self, item):
+        if item is self._hover_item:
+            return
+        for changed in (self._hover_item, item):
+            if changed is not None:
+                rect = self.mapFromScene(changed.sceneBoundingRect()).boundingRect()
+                self.viewport().update(rect.adjusted(-4, -4, 4, 4))
+        self._hover_item = item
 
     def center_dxf_in_view(self):
         """Centruje rysunek w widoku (po transformacji)."""
@@ -127,6 +395,7 @@ class CustomGraphicsView(QGraphicsView):
         scene_center = self._scene.sceneRect().center()
         offset = scene_center - view_center
         self.translate(offset.x(), offset.y())
+        self.update_render_mode()
 
     # Rysowanie linii centralnych w widoku
     def drawForeground(self, painter, rect):
@@ -139,6 +408,16 @@ class CustomGraphicsView(QGraphicsView):
         painter.drawLine(view_rect.left(), center.y(), view_rect.right(), center.y())
         painter.drawLine(center.x(), view_rect.top(), center.x(), view_rect.bottom())
 
+        # Podświetlenie linii gięcia pod kursorem (rysowane w widoku, bez zmiany pióra elementu)
+        if self._hover_item is not None:
+            line = self._hover_item.line()
+            p1 = self.mapFromScene(self._hover_item.mapToScene(line.p1()))
+            p2 = self.mapFromScene(self._hover_item.mapToScene(line.p2()))
+            hover_pen = QPen(QColor(255, 140, 0, 160))
+            hover_pen.setWidth(4)
+            painter.setPen(hover_pen)
+            painter.drawLine(p1, p2)
+
     # Obsługa panningu
     def mousePressEvent(self, event):
         if event.button() == Qt.LeftButton:
@@ -153,36 +432,24 @@ class CustomGraphicsView(QGraphicsView):
             delta = event.pos() - self._panStart
             self._panStart = event.pos()
             self.translate(delta.x(), delta.y())
+        elif self._bending_index is not None:
+            self._set_hover_item(self.bending_line_at(self.mapToScene(event.pos())))
         if self.main_window:
             pos = self.mapToScene(event.pos())
-            self.main_window.update_status_bar(pos)
+            self.main_window.update_status_bar(self.part_point(pos))
         super().mouseMoveEvent(event)
 
     def mouseReleaseEvent(self, event):
         if event.button() == Qt.LeftButton:
             self.viewport().setCursor(Qt.ArrowCursor)
             if (event.pos() - self._mouse_pressed_position).manhattanLength() < 10:
-                # Kliknięcie w linię gięcia
-                pos = self.mapToScene(event.pos())
-                tolerance = 20.0
-                search_rect = QRectF(pos.x() - tolerance, pos.y() - tolerance, tolerance * 2, tolerance * 2)
-                items = self._scene.items(search_rect, Qt.IntersectsItemShape)
-                closest_item = None
-                closest_dist = tolerance
-                for it in items:
-                    if isinstance(it, QGraphicsLineItem) and it.data(0) == "bending":
-                        p1 = it.mapToScene(it.line().p1())
-                        p2 = it.mapToScene(it.line().p2())
-                        qline = QLineF(p1, p2)
-                        dist = self._distance_to_point(qline, pos)
-                        if dist < closest_dist:
-                            closest_dist = dist
-                            closest_item = it
+                # Kliknięcie w linię gięcia – najbliższa linia z indeksu przestrzennego
+                closest_item = self.bending_line_at(self.mapToScene(event.pos()))
                 if closest_item and self.main_window:
                     p1 = closest_item.mapToScene(closest_item.line().p1())
                     p2 = closest_item.mapToScene(closest_item.line().p2())
                     qline = QLineF(p1, p2)
-                    clicked_point = QPointF((qline.x1() + qline.x2())/2, (qline.y1() + qline.y2())/2)
+                    clicked_point = self.part_point(QPointF((qline.x1() + qline.x2())/2, (qline.y1() + qline.y2())/2))
                     self.main_window.handle_bending_line_click(closest_item, clicked_point)
             self._isPanning = False
         super().mouseReleaseEvent(event)
@@ -194,23 +461,37 @@ class CustomGraphicsView(QGraphicsView):
             self.scale(zoom_in_factor, zoom_in_factor)
         else:
             self.scale(zoom_out_factor, zoom_out_factor)
+        self.update_render_mode()
+
+    def zoom(self):
+        """Bieżące powiększenie – piksele ekranu na jednostkę rysunku."""
+        return abs(self.transform().m11())
+
+    def update_render_mode(self):
+        """Dobiera antyaliasing i buforowanie kafli do bieżącego powiększenia."""
+        zoom = self.zoom()
+        self.setRenderHint(QPainter.Antialiasing, zoom >= self.antialias_min_zoom)
+        if zoom * self.tile_size <= self.tile_cache_max_px:
+            cache_mode = QGraphicsItem.DeviceCoordinateCache
+        else:
+            cache_mode = QGraphicsItem.NoCache
+        if cache_mode != self._tile_cache_mode:
+            self._tile_cache_mode = cache_mode
+            for item in list(self._contour_items.values()) + self._block_items:
+                item.setCacheMode(cache_mode)
 
-    def _distance_to_point(self, line: QLineF, point: QPointF) -> float:
-        A = line.p1()
-        B = line.p2()
-        AP = point - A
-        AB = B - A
-        ab2 = AB.x()**2 + AB.y()**2
-        if ab2 == 0:
-            return (AP.x()**2 + AP.y()**2)**0.5
-        t = (AP.x()*AB.x() + AP.y()*AB.y()) / ab2
-        if t < 0:
-            closest = A
-        elif t > 1:
-            closest = B
+    def set_opengl_viewport(self, enabled):
+        """Przełącza obszar rysowania na QOpenGLWidget (rysowanie przez GPU) lub zwykły QWidget."""
+        if enabled:
+            from PyQt5.QtWidgets import QOpenGLWidget
+            self.setViewport(QOpenGLWidget())
+            # Z OpenGL cała klatka i tak jest rysowana od nowa
+            self.setViewportUpdateMode(QGraphicsView.FullViewportUpdate)
         else:
-            closest = A + AB * t
-        return (point - closest).manhattanLength()
+            self.setViewport(QWidget())
+            self.setViewportUpdateMode(QGraphicsView.MinimalViewportUpdate)
+        self.viewport().setMouseTracking(True)
+        self.viewport().setCursor(Qt.ArrowCursor)
 
 
 # jest ok
\ No newline at end of file
@@ -1,13 +1,15 @@
 # ui/main_window.py
 from PyQt5.QtWidgets import (
     QMainWindow, QHBoxLayout, QWidget, QVBoxLayout, QPushButton, QAction,
-    QFileDialog, QMessageBox
+    QFileDialog, QMessageBox, QProgressBar
 )
 from PyQt5.QtCore import Qt, QPointF
 
 from ui.dxf_view import CustomGraphicsView
 from ui.parameter_manager import ParameterManager
 from ui.segment_manager import SegmentManager
+from models.training_worker import ModelTrainingWorker
+from data.matrix_config import matrix_config_service
 
 
 class MainWindow(QMainWindow):
@@ -18,16 +20,37 @@ class MainWindow(QMainWindow):
         self.model = model
         self.matrix_config_editor = matrix_config_editor
         self.data_editor = data_editor
+        self.training_worker = None
 
         self.init_ui()
         self.create_menus()
 
+        if data is None:
+            # Szybki start: dane i modele wczytywane są w tle (zob. set_startup_data)
+            self.segment_manager.calculate_button.setEnabled(False)
+            self.statusBar().showMessage("Wczytywanie danych i modeli...")
+        else:
+            self.set_startup_data(data, matrix_config_editor, data_editor)
+
         # Uruchamiamy na pełnym ekranie
         self.showMaximized()
 
     def init_ui(self):
         self.statusBar().showMessage("X: 0.00, Y: 0.00")
 
+        # Pasek postępu treningu modeli w tle
+        self.training_progress = QProgressBar()
+        self.training_progress.setRange(0, 100)
+        self.training_progress.setMaximumWidth(300)
+        self.training_progress.hide()
+        self.statusBar().addPermanentWidget(self.training_progress)
+
+        # Pasek postępu wczytywania DXF
+        self.dxf_progress = QProgressBar()
+        self.dxf_progress.setMaximumWidth(300)
+        self.dxf_progress.hide()
+        self.statusBar().addPermanentWidget(self.dxf_progress)
+
         self.main_widget = QWidget()
         self.main_layout = QHBoxLayout()
 
@@ -52,12 +75,23 @@ class MainWindow(QMainWindow):
         right_widget = QWidget()
         right_layout = QVBoxLayout()
 
+        dxf_buttons_layout = QHBoxLayout()
         load_dxf_button = QPushButton("Wczytaj Plik DXF")
         load_dxf_button.clicked.connect(self.load_dxf_file)
-        right_layout.addWidget(load_dxf_button)
+        dxf_buttons_layout.addWidget(load_dxf_button)
+
+        self.cancel_dxf_button = QPushButton("Anuluj wczytywanie")
+        self.cancel_dxf_button.hide()
+        dxf_buttons_layout.addWidget(self.cancel_dxf_button)
+        right_layout.addLayout(dxf_buttons_layout)
 
         self.dxf_view = CustomGraphicsView()
         self.dxf_view.main_window = self
+        self.dxf_view.load_progress.connect(self.on_dxf_load_progress)
+        self.dxf_view.load_finished.connect(self.on_dxf_load_finished)
+        self.dxf_view.load_cancelled.connect(self.on_dxf_load_cancelled)
+        self.dxf_view.load_failed.connect(self.on_dxf_load_failed)
+        self.cancel_dxf_button.clicked.connect(self.dxf_view.cancel_loading)
         right_layout.addWidget(self.dxf_view)
 
         right_widget.setLayout(right_layout)
@@ -80,13 +114,97 @@ class MainWindow(QMainWindow):
         data_editor_action.triggered.connect(self.open_data_editor)
         konfiguracja_menu.addAction(data_editor_action)
 
+        self.cancel_training_action = QAction("Przerwij trening modeli", self)
+        self.cancel_training_action.triggered.connect(self.cancel_model_training)
+        self.cancel_training_action.setEnabled(False)
+        konfiguracja_menu.addAction(self.cancel_training_action)
+
+        widok_menu = menubar.addMenu("Widok")
+        self.opengl_action = QAction("Akceleracja OpenGL", self)
+        self.opengl_action.setCheckable(True)
+        self.opengl_action.toggled.connect(self.dxf_view_set_opengl)
+        widok_menu.addAction(self.opengl_action)
+
+    def dxf_view_set_opengl(self, enabled):
+        self.dxf_view.set_opengl_viewport(enabled)
+
+    def set_startup_data(self, data, matrix_config_editor, data_editor):
+        """Podpina wczytane dane i edytory oraz odblokowuje obliczenia."""
+        self.data = data
+        self.matrix_config_editor = matrix_config_editor
+        self.data_editor = data_editor
+
+        # Edytor danych odwołuje się do okna głównego przez parent() (dane, model, trening)
+        if self.data_editor is not None:
+            self.data_editor.setParent(self, self.data_editor.windowFlags())
+
+        self.populate_comboboxes()
+        self.segment_manager.calculate_button.setEnabled(True)
+        self.statusBar().showMessage("Dane i modele wczytane.", 3000)
+
     def open_matrix_config_editor(self):
+        if self.matrix_config_editor is None:
+            return
+        # Plik mógł zostać zmieniony poza aplikacją – jedyny moment, w którym sprawdzamy dysk
+        if matrix_config_service.reload_if_changed():
+            self.matrix_config_editor.set_config(matrix_config_service.config())
         self.matrix_config_editor.exec_()
         self.parameter_manager.update_v_input()
 
     def open_data_editor(self):
+        if self.data_editor is None:
+            return
         self.data_editor.exec_()
 
+    def start_model_training(self, data):
+        """Uruchamia trening modeli w tle; do czasu podmiany obliczenia używają starych modeli."""
+        if self.training_worker is not None and self.training_worker.isRunning():
+            self.training_worker.cancel()
+            self.training_worker.wait()
+
+        self.training_worker = ModelTrainingWorker(self.model, data, self)
+        self.training_worker.progress.connect(self.on_training_progress)
+        self.training_worker.trained.connect(self.on_training_finished)
+        self.training_worker.cancelled.connect(self.on_training_cancelled)
+        self.training_worker.failed.connect(self.on_training_failed)
+
+        self.training_progress.setValue(0)
+        self.training_progress.setFormat("Trening modeli (%p%)")
+        self.training_progress.show()
+        self.cancel_training_action.setEnabled(True)
+        self.training_worker.start()
+
+    def cancel_model_training(self):
+        if self.training_worker is not None and self.training_worker.isRunning():
+            self.training_worker.cancel()
+
+    def on_training_progress(self, percent, message):
+        self.training_progress.setValue(percent)
+        self.training_progress.setFormat(f"{message} (%p%)")
+
+    def on_training_finished(self):
+        self._training_done()
+        self.statusBar().showMessage("Modele przetrenowano na nowych danych.", 5000)
+
+    def on_training_cancelled(self):
+        self._training_done()
+        self.statusBar().showMessage("Trening modeli przerwany – używane są dotychczasowe modele.", 5000)
+
+    def on_training_failed(self, error):
+        self._training_done()
+        QMessageBox.warning(self, "Błąd", f"Nie udało się przetrenować modeli:\n{error}")
+
+    def _training_done(self):
+        self.training_progress.hide()
+        self.cancel_training_action.setEnabled(False)
+
+    def closeEvent(self, event):
+        self.dxf_view.cancel_loading(emit_signal=False)
+        if self.training_worker is not None and self.training_worker.isRunning():
+            self.training_worker.cancel()
+            self.training_worker.wait()
+        super().closeEvent(event)
+
     def load_dxf_file(self):
         """Wywoływane po kliknięciu przycisku 'Wczytaj Plik DXF'."""
         file_path, _ = QFileDialog.getOpenFileName(self, "Wybierz Plik DXF", "", "Pliki DXF (*.dxf)")
@@ -94,16 +212,39 @@ class MainWindow(QMainWindow):
             return
         try:
             # Czyścimy tabelę (np. przy nowym DXF)
-            self.segment_manager.table.setRowCount(0)
-            self.segment_manager.remove_all_plus_rows()
-            self.segment_manager.ensure_plus_row()
+            self.segment_manager.clear()
 
-            # Oddajemy wczytywanie do dxf_view
+            # Oddajemy wczytywanie do dxf_view (w tle – zakończenie sygnalizuje load_finished)
             self.dxf_view.load_dxf(file_path)
+            self.dxf_progress.setRange(0, 0)  # do pierwszego raportu postępu – pasek nieokreślony
+            self.dxf_progress.setFormat("Wczytywanie DXF (%p%)")
+            self.dxf_progress.show()
+            self.cancel_dxf_button.show()
 
         except Exception as e:
             QMessageBox.warning(self, "Błąd", f"Nie udało się wczytać pliku DXF:\n{e}")
 
+    def on_dxf_load_progress(self, percent):
+        self.dxf_progress.setRange(0, 100)
+        self.dxf_progress.setValue(percent)
+
+    def on_dxf_load_finished(self):
+        self._dxf_load_done()
+        self.segment_manager.fill_from_bend_analysis(self.dxf_view.bend_analysis)
+        self.statusBar().showMessage("Plik DXF wczytany.", 3000)
+
+    def on_dxf_load_cancelled(self):
+        self._dxf_load_done()
+        self.statusBar().showMessage("Wczytywanie DXF anulowane.", 3000)
+
+    def on_dxf_load_failed(self, error):
+        self._dxf_load_done()
+        QMessageBox.warning(self, "Błąd", f"Nie udało się wczytać pliku DXF:\n{error}")
+
+    def _dxf_load_done(self):
+        self.dxf_progress.hide()
+        self.cancel_dxf_button.hide()
+
     def handle_bending_line_click(self, item, clicked_point):
         """Wywoływane z dxf_view, gdy klikniemy w linię gięcia."""
         self.segment_manager.handle_bending_line_click_in_segment_table(item, clicked_point)
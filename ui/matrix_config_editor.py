@@ -1,30 +1,7 @@
 # ui/matrix_config_editor.py
 from PyQt5.QtWidgets import QDialog, QVBoxLayout, QTableWidget, QTableWidgetItem, QPushButton, QMessageBox
 from PyQt5.QtCore import Qt
-import json
-import os
-
-CONFIG_FILE = "config/matrix_config.json"
-
-def load_matrix_config():
-    """Wczytuje konfigurację matryc z pliku JSON."""
-    try:
-        with open(CONFIG_FILE, "r") as file:
-            return json.load(file)
-    except FileNotFoundError:
-        return {}
-    except json.JSONDecodeError as e:
-        print(f"Błąd wczytywania konfiguracji matryc: {e}")
-        return {}
-
-def save_matrix_config(config):
-    """Zapisuje konfigurację matryc do pliku JSON."""
-    try:
-        with open(CONFIG_FILE, "w") as file:
-            json.dump(config, file, indent=4)
-            print(f"Zapisano konfigurację matryc w {CONFIG_FILE}")
-    except Exception as e:
-        print(f"Błąd zapisu konfiguracji matryc: {e}")
+from data.matrix_config import matrix_config_service
 
 class MatrixConfigEditor(QDialog):
     """Okno przypisywania matryc do grubości materiału."""
@@ -33,7 +10,7 @@ class MatrixConfigEditor(QDialog):
         self.setWindowTitle("Przypisz Matryce")
         self.grubosci = grubosci
         self.matryce = matryce
-        self.config = load_matrix_config()
+        self.config = matrix_config_service.config()
         self.init_ui()
 
     def init_ui(self):
@@ -43,11 +20,10 @@ class MatrixConfigEditor(QDialog):
         self.table.setHorizontalHeaderLabels([str(m) for m in self.matryce])
         self.table.setVerticalHeaderLabels([str(g) for g in self.grubosci])
 
-        for row, grubosc in enumerate(self.grubosci):
-            for col, matryca in enumerate(self.matryce):
-                item = QTableWidgetItem()
-                item.setCheckState(Qt.Checked if str(grubosc) in self.config and matryca in self.config[str(grubosc)] else Qt.Unchecked)
-                self.table.setItem(row, col, item)
+        for row in range(len(self.grubosci)):
+            for col in range(len(self.matryce)):
+                self.table.setItem(row, col, QTableWidgetItem())
+        self.update_check_states()
 
         self.table.resizeColumnsToContents()
 
@@ -67,6 +43,17 @@ class MatrixConfigEditor(QDialog):
 
         self.setLayout(layout)
 
+    def set_config(self, config):
+        """Odświeża zaznaczenia po zmianie konfiguracji (np. pliku zmienionego poza aplikacją)."""
+        self.config = config
+        self.update_check_states()
+
+    def update_check_states(self):
+        for row, grubosc in enumerate(self.grubosci):
+            for col, matryca in enumerate(self.matryce):
+                item = self.table.item(row, col)
+                item.setCheckState(Qt.Checked if str(grubosc) in self.config and matryca in self.config[str(grubosc)] else Qt.Unchecked)
+
     def save_config(self):
         """Zapisuje nową konfigurację."""
         new_config = {}
@@ -78,6 +65,10 @@ class MatrixConfigEditor(QDialog):
                     selected_matryce.append(matryca)
             new_config[str(grubosc)] = selected_matryce
 
-        save_matrix_config(new_config)
+        try:
+            matrix_config_service.save(new_config)
+        except Exception as e:
+            QMessageBox.warning(self, "Błąd", f"Nie udało się zapisać konfiguracji matryc:\n{e}")
+            return
         QMessageBox.information(self, "Sukces", "Konfiguracja matryc została zapisana.")
         self.accept()
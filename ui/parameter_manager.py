@@ -1,7 +1,5 @@
 # ui/parameter_manager.py
 from PyQt5.QtWidgets import QHBoxLayout, QComboBox, QLabel
-import pandas as pd
-from data.data_loader import filter_matrix_widths
 
 class ParameterManager:
     def __init__(self, parent):
@@ -26,7 +24,7 @@ class ParameterManager:
         self.layout.addWidget(QLabel("Materiał:"))
         self.layout.addWidget(self.material_input)
 
-    def populate_comboboxes(self, data: pd.DataFrame):
+    def populate_comboboxes(self, data):
         self.data = data
         grubosc_values = sorted(data['Grubosc'].unique())
         self.grubosc_input.clear()
@@ -51,7 +49,8 @@ class ParameterManager:
         widths_from_data = sorted(set(self.data.loc[self.data['Grubosc'] == selected_grubosc_float, 'V']))
         print("DEBUG: widths_from_data dla grubości =", selected_grubosc_float, "to:", widths_from_data)
 
-        # Filtrowanie przez config
+        # Filtrowanie przez config (import leniwy – data_loader ciągnie pandas)
+        from data.data_loader import filter_matrix_widths
         allowed_widths = filter_matrix_widths(selected_grubosc_float, widths_from_data)
         print("DEBUG: allowed_widths po filtrze =", allowed_widths)
 
@@ -0,0 +1,135 @@
+# ui/segment_table_model.py
+import math
+from PyQt5.QtCore import Qt, QAbstractTableModel, QModelIndex
+from PyQt5.QtGui import QColor, QFont
+from models.segment_store import SegmentStore
+
+
+class SegmentTableModel(QAbstractTableModel):
+    """
+    Tabela segmentów nad SegmentStore. Wartości formatowane są dopiero przy rysowaniu widocznych
+    komórek, a każda zmiana zgłasza tylko wiersze, które faktycznie się zmieniły.
+    Ostatni wiersz to przycisk "+" (dodanie segmentu), ostatnia kolumna – przycisk "-" (usunięcie).
+    """
+    LENGTH, ANGLE, BD, ACTION = range(4)
+    HEADERS = ["Długość [mm]", "Kąt gięcia [°]", "BD [mm]", ""]
+
+    def __init__(self, store=None, parent=None):
+        super().__init__(parent)
+        self.store = store if store is not None else SegmentStore()
+        self._button_font = QFont()
+        self._button_font.setBold(True)
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.store) + 1
+
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.HEADERS)
+
+    def is_plus_row(self, row):
+        return row == len(self.store)
+
+    def headerData(self, section, orientation, role=Qt.DisplayRole):
+        if role == Qt.DisplayRole and orientation == Qt.Horizontal:
+            return self.HEADERS[section]
+        return super().headerData(section, orientation, role)
+
+    def flags(self, index):
+        if not index.isValid():
+            return Qt.NoItemFlags
+        if not self.is_plus_row(index.row()) and index.column() in (self.LENGTH, self.ANGLE):
+            return Qt.ItemIsEnabled | Qt.ItemIsSelectable | Qt.ItemIsEditable
+        return Qt.ItemIsEnabled
+
+    def _button(self, row, column):
+        """Tekst i kolor przycisku w komórce albo None."""
+        if self.is_plus_row(row):
+            return ("+", "green") if column == self.LENGTH else None
+        return ("-", "red") if column == self.ACTION else None
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid():
+            return None
+        row, column = index.row(), index.column()
+        button = self._button(row, column)
+        if button is not None:
+            if role == Qt.DisplayRole:
+                return button[0]
+            if role == Qt.BackgroundRole:
+                return QColor(button[1])
+            if role == Qt.ForegroundRole:
+                return QColor("white")
+            if role == Qt.FontRole:
+                return self._button_font
+            if role == Qt.TextAlignmentRole:
+                return Qt.AlignCenter
+            return None
+        if self.is_plus_row(row) or role not in (Qt.DisplayRole, Qt.EditRole):
+            return None
+
+        store = self.store
+        if column == self.LENGTH:
+            return f"{store.length(row):.2f}"
+        if column == self.ANGLE:
+            return f"{store.angle[row]:g}"
+        if column == self.BD:
+            bd = store.bd[row]
+            return "" if math.isnan(bd) else f"{bd:.2f}"
+        return None
+
+    def setData(self, index, value, role=Qt.EditRole):
+        if role != Qt.EditRole or not (self.flags(index) & Qt.ItemIsEditable):
+            return False
+        try:
+            value = float(str(value).replace(",", "."))
+        except ValueError:
+            return False
+        row = index.row()
+        if index.column() == self.LENGTH:
+            if not self.store.set_length(row, value):
+                return False
+            # Przesuwają się dalsze gięcia, ale ich długości pozostają – zmienia się jedna komórka
+            self.dataChanged.emit(index, index)
+        else:
+            self.store.set_angle(row, value)
+            self.dataChanged.emit(index, self.index(row, self.BD))
+        return True
+
+    def _length_changed(self, row):
+        if 0 <= row < len(self.store):
+            cell = self.index(row, self.LENGTH)
+            self.dataChanged.emit(cell, cell)
+
+    def insert_segment(self, x, angle=90.0, line_ids=()):
+        """Wstawia segment w miejscu wynikającym z pozycji x i zwraca jego wiersz."""
+        row = self.store.insertion_row(x)
+        self.beginInsertRows(QModelIndex(), row, row)
+        self.store.insert(x, angle, line_ids)
+        self.endInsertRows()
+        self._length_changed(row + 1)
+        return row
+
+    def append_segment(self, length, angle=90.0):
+        """Dodaje ręcznie segment o podanej długości za ostatnim gięciem."""
+        return self.insert_segment(self.store.total_length() + length, angle)
+
+    def remove_segment(self, row):
+        """Usuwa segment i zwraca identyfikatory jego linii gięcia."""
+        self.beginRemoveRows(QModelIndex(), row, row)
+        line_ids = self.store.remove(row)
+        self.endRemoveRows()
+        self._length_changed(row)
+        return line_ids
+
+    def reset_segments(self, xs=(), angles=(), line_ids=()):
+        """Zastępuje wszystkie segmenty (jedno przebudowanie widoku zamiast wstawiania wierszy po kolei)."""
+        self.beginResetModel()
+        self.store.clear()
+        if len(xs):
+            self.store.extend(xs, angles, line_ids)
+        self.endResetModel()
+
+    def set_bd(self, values):
+        self.store.set_bd(values)
+        if len(self.store):
+            self.dataChanged.emit(self.index(0, self.BD), self.index(len(self.store) - 1, self.BD))
@@ -0,0 +1,32 @@
+# ui/startup_loader.py
+from PyQt5.QtCore import QThread, pyqtSignal
+
+
+class StartupLoader(QThread):
+    """Wczytuje dane treningowe i modele w tle, gdy okno główne jest już widoczne."""
+    loaded = pyqtSignal(object)
+    failed = pyqtSignal(str)
+
+    def __init__(self, model, timer, parent=None):
+        super().__init__(parent)
+        self.model = model
+        self.timer = timer
+
+    def run(self):
+        try:
+            with self.timer.phase("wczytanie danych"):
+                from data.data_loader import load_data
+                data = load_data()
+
+            with self.timer.phase("wczytanie modeli"):
+                from data.matrix_config import matrix_config_service
+
+                # Siatka BD dla par (grubość, V) z konfiguracji matryc – budowana po wczytaniu modeli
+                self.model.enable_lookup_grid(matrix_config_service.pairs())
+
+                # Próba wczytania lub przetrenowania modeli
+                self.model.train_models(data, force_retrain=False)
+
+            self.loaded.emit(data)
+        except Exception as e:
+            self.failed.emit(str(e))
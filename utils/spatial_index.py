@@ -0,0 +1,103 @@
+# utils/spatial_index.py
+import numpy as np
+
+
+class LineGridIndex:
+    """
+    Indeks przestrzenny odcinków oparty na jednorodnej siatce komórek (tablice NumPy).
+    Każdy odcinek jest próbkowany co pół komórki, a pary (komórka, odcinek) trzymamy posortowane
+    po numerze komórki – zapytanie to kilka wyszukiwań binarnych i wektorowe liczenie odległości
+    dla kandydatów z komórek wokół punktu.
+    """
+    def __init__(self, x1, y1, x2, y2, cell_size=None):
+        self.x1 = np.asarray(x1, dtype=float).ravel()
+        self.y1 = np.asarray(y1, dtype=float).ravel()
+        self.x2 = np.asarray(x2, dtype=float).ravel()
+        self.y2 = np.asarray(y2, dtype=float).ravel()
+        n = len(self.x1)
+
+        self.cell_keys = np.empty(0, dtype=np.int64)
+        self.cell_lines = np.empty(0, dtype=np.int64)
+        if n == 0:
+            self.origin = (0.0, 0.0)
+            self.cell_size = 1.0
+            self.shape = (1, 1)
+            return
+
+        xs = np.concatenate((self.x1, self.x2))
+        ys = np.concatenate((self.y1, self.y2))
+        min_x, min_y = xs.min(), ys.min()
+        width = xs.max() - min_x
+        height = ys.max() - min_y
+        if cell_size is None:
+            # ok. sqrt(n) komórek na bok – przy kilku tysiącach linii kilkadziesiąt kandydatów na zapytanie
+            cell_size = max(width, height) / max(np.sqrt(n), 1.0)
+        self.cell_size = float(cell_size) if cell_size > 0 else 1.0
+        self.origin = (float(min_x), float(min_y))
+        self.shape = (int(width // self.cell_size) + 1, int(height // self.cell_size) + 1)
+
+        # Próbki co pół komórki – każdy punkt odcinka leży najwyżej ćwierć komórki od próbki
+        dx = self.x2 - self.x1
+        dy = self.y2 - self.y1
+        lengths = np.hypot(dx, dy)
+        counts = np.ceil(lengths / (self.cell_size / 2)).astype(np.int64) + 1
+        line_of_sample = np.repeat(np.arange(n, dtype=np.int64), counts)
+        starts = np.cumsum(counts) - counts
+        local = np.arange(counts.sum(), dtype=np.int64) - np.repeat(starts, counts)
+        t = local / np.maximum(counts - 1, 1)[line_of_sample]
+        px = self.x1[line_of_sample] + t * dx[line_of_sample]
+        py = self.y1[line_of_sample] + t * dy[line_of_sample]
+
+        keys = self._cell_keys(px, py)
+        pairs = np.unique(keys * n + line_of_sample)
+        self.cell_keys = pairs // n
+        self.cell_lines = pairs % n
+
+    def __len__(self):
+        return len(self.x1)
+
+    def _cell_keys(self, px, py):
+        cx = np.clip(((px - self.origin[0]) // self.cell_size).astype(np.int64), 0, self.shape[0] - 1)
+        cy = np.clip(((py - self.origin[1]) // self.cell_size).astype(np.int64), 0, self.shape[1] - 1)
+        return cx * self.shape[1] + cy
+
+    def candidates(self, x, y, radius):
+        """Indeksy odcinków, które mogą leżeć w odległości <= radius od punktu (x, y)."""
+        if len(self.cell_keys) == 0:
+            return np.empty(0, dtype=np.int64)
+        reach = radius + self.cell_size / 4
+        x0, y0 = self.origin
+        ix0 = max(int((x - reach - x0) // self.cell_size), 0)
+        ix1 = min(int((x + reach - x0) // self.cell_size), self.shape[0] - 1)
+        iy0 = max(int((y - reach - y0) // self.cell_size), 0)
+        iy1 = min(int((y + reach - y0) // self.cell_size), self.shape[1] - 1)
+        if ix0 > ix1 or iy0 > iy1:
+            return np.empty(0, dtype=np.int64)
+
+        # Komórki jednej kolumny siatki mają kolejne klucze – jedno wyszukiwanie na kolumnę
+        columns = np.arange(ix0, ix1 + 1, dtype=np.int64) * self.shape[1]
+        lo = np.searchsorted(self.cell_keys, columns + iy0, side='left')
+        hi = np.searchsorted(self.cell_keys, columns + iy1, side='right')
+        if not (hi > lo).any():
+            return np.empty(0, dtype=np.int64)
+        return np.unique(np.concatenate([self.cell_lines[a:b] for a, b in zip(lo, hi) if b > a]))
+
+    def distances(self, x, y, indices):
+        """Odległości euklidesowe punktu (x, y) od wskazanych odcinków."""
+        x1, y1 = self.x1[indices], self.y1[indices]
+        dx, dy = self.x2[indices] - x1, self.y2[indices] - y1
+        ab2 = dx * dx + dy * dy
+        t = np.where(ab2 > 0, ((x - x1) * dx + (y - y1) * dy) / np.where(ab2 > 0, ab2, 1.0), 0.0)
+        t = np.clip(t, 0.0, 1.0)
+        return np.hypot(x - (x1 + t * dx), y - (y1 + t * dy))
+
+    def nearest(self, x, y, max_distance):
+        """Zwraca (indeks, odległość) najbliższego odcinka w promieniu max_distance albo (None, None)."""
+        indices = self.candidates(x, y, max_distance)
+        if len(indices) == 0:
+            return None, None
+        dist = self.distances(x, y, indices)
+        best = int(np.argmin(dist))
+        if dist[best] > max_distance:
+            return None, None
+        return int(indices[best]), float(dist[best])
@@ -0,0 +1,34 @@
+# utils/startup_timer.py
+import time
+from contextlib import contextmanager
+
+
+class StartupTimer:
+    """Mierzy czas kolejnych faz uruchamiania aplikacji i drukuje raport."""
+    def __init__(self):
+        self.start = time.perf_counter()
+        self.phases = []
+        self.milestones = []
+
+    @contextmanager
+    def phase(self, name):
+        """Mierzy czas trwania bloku jako fazę o podanej nazwie."""
+        phase_start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.phases.append((name, time.perf_counter() - phase_start))
+
+    def mark(self, name):
+        """Zapisuje punkt kontrolny – czas od startu aplikacji."""
+        self.milestones.append((name, time.perf_counter() - self.start))
+
+    def report(self):
+        lines = ["Raport czasu uruchamiania:"]
+        for name, seconds in self.phases:
+            lines.append(f"  {name:<25} {seconds * 1000:8.1f} ms")
+        for name, seconds in self.milestones:
+            lines.append(f"  [{name}] po {seconds * 1000:.1f} ms od startu")
+        text = "\n".join(lines)
+        print(text)
+        return text